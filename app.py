@@ -5,9 +5,17 @@ import tempfile
 import streamlit as st
 from gtts import gTTS
 
-from text_utils import read_text, is_internet_available
+from text_utils import read_text, read_text_with_offsets, is_internet_available
 from speech_utils import recognize_speech_from_mic, text_to_speech_auto
-from nlp_utils import load_translation_models, translate_text, load_summarizer, summarize_text
+from nlp_utils import (
+    load_translation_models, translate_any, load_summarizer, summarize_text,
+    GENERATION_PRESETS, DEFAULT_PRESET,
+)
+from resource_utils import apply_resource_budget, extraction_slot
+from store_utils import DocumentStore, file_sha256, text_sha256
+from search_utils import SearchIndex
+from tm_utils import TranslationMemory
+from profile_utils import profile_document
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -25,10 +33,203 @@ if "selected_language_code" not in st.session_state:
     st.session_state.selected_language_code = "en"
 if "accessibility_mode" not in st.session_state:
     st.session_state.accessibility_mode = False
+if "preset" not in st.session_state:
+    st.session_state.preset = DEFAULT_PRESET
+if "doc_hash" not in st.session_state:
+    st.session_state.doc_hash = None
+if "upload_id" not in st.session_state:
+    st.session_state.upload_id = None
+# Large documents are kept only in the document store; the session holds a
+# handle (hash + length) and reads one page or window at a time.
+if "large_doc" not in st.session_state:
+    st.session_state.large_doc = False
+if "doc_chars" not in st.session_state:
+    st.session_state.doc_chars = 0
+if "processed_hash" not in st.session_state:
+    st.session_state.processed_hash = None
+
+LARGE_DOC_CHARS    = 200_000   # ~35k words; larger documents switch to large-document mode
+PREVIEW_PAGE_CHARS = 20_000    # characters shown per preview page
+WINDOW_CHARS       = 100_000   # characters summarized / translated at a time
+
+# ── CPU budget (applied once per process) ─────────────────────────────────────
+# Too late for OMP_NUM_THREADS under `streamlit run`; torch is capped via its API
+apply_resource_budget()
 
 # ── Load NLP models (cached) ──────────────────────────────────────────────────
 translation_models, translation_tokenizers = load_translation_models()
-summarizer_pipeline = load_summarizer()
+
+
+@st.cache_resource
+def get_document_store():
+    """One SQLite-backed store shared by every session in this process."""
+    store = DocumentStore()
+    store.compact()
+    return store
+
+
+@st.cache_resource
+def get_search_index():
+    return SearchIndex(get_document_store())
+
+
+@st.cache_resource
+def get_translation_memory():
+    memory = TranslationMemory(get_document_store())
+    memory.compact()
+    return memory
+
+
+document_store = get_document_store()
+search_index = get_search_index()
+translation_memory = get_translation_memory()
+
+
+def _open_document(doc_hash, text=None):
+    """
+    Make a stored document the current one. Small documents are also kept in
+    the session; large ones only as a handle, so reruns never copy their text.
+    """
+    chars = len(text) if text is not None else document_store.length(doc_hash)
+    large = chars > LARGE_DOC_CHARS
+    if large:
+        text = ""
+    elif text is None:
+        text = document_store.get(doc_hash).text
+    if doc_hash != st.session_state.doc_hash:
+        # A new document: forget results and preview pages of the previous one
+        st.session_state.processed_content = text
+        st.session_state.processed_hash = None
+        st.session_state.pop("preview_page", None)
+        st.session_state.pop("result_page", None)
+    st.session_state.doc_hash = doc_hash
+    st.session_state.doc_chars = chars
+    st.session_state.large_doc = large
+    st.session_state.content = text
+
+
+def _page_range(page, chars):
+    start = (page - 1) * PREVIEW_PAGE_CHARS
+    return start, min(chars, start + PREVIEW_PAGE_CHARS)
+
+
+def _paged_preview(label, doc_hash, chars, key):
+    """
+    Show one page of a stored document. Only that page is read from the store
+    and sent to the browser, however large the document is.
+    """
+    pages = max(1, -(-chars // PREVIEW_PAGE_CHARS))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    start, end = _page_range(page, chars)
+    st.caption(f"Large document — showing characters {start:,}–{end:,} of {chars:,}.")
+    st.text_area(label, document_store.read_range(doc_hash, start, end), height=250, key=f"{key}_text_{page}")
+
+
+def _windows(doc_hash):
+    """Consecutive windows of a stored document, with a progress bar."""
+    total = document_store.length(doc_hash) or 1
+    bar = st.progress(0.0)
+    done = 0
+    for window in document_store.iter_windows(doc_hash, WINDOW_CHARS):
+        yield window
+        done += len(window)
+        bar.progress(min(1.0, done / total))
+    bar.empty()
+
+
+def _summarize_source(text, preset):
+    """Returns (English source, summary) for one piece of text."""
+    # BART is English-only: other languages are translated to English first
+    source = translate_any(text, "en", translation_models, translation_tokenizers,
+                           preset=preset, memory=translation_memory)
+    return source, summarize_text(source, summarizer_pipeline, preset=preset)
+
+
+def _summarize_cached():
+    """Summary of the current document, backed by the document store (keyed by document hash and preset)."""
+    doc_hash, preset = st.session_state.doc_hash, st.session_state.preset
+    cached = document_store.get_summary(doc_hash, preset) if doc_hash else None
+    if cached:
+        return cached
+    # summarize_text() returns its input unchanged when it fails; such results are not cached
+    if st.session_state.large_doc:
+        # Summarize window by window, then summarize the partial summaries
+        pieces = [_summarize_source(window, preset) for window in _windows(doc_hash)]
+        failed = any(summary == source for source, summary in pieces)
+        partial = [summary for _, summary in pieces]
+        if len(partial) == 1:
+            result = partial[0]
+        else:
+            joined = " ".join(partial)
+            result = summarize_text(joined, summarizer_pipeline, preset=preset)
+            failed = failed or result == joined
+    else:
+        source, result = _summarize_source(st.session_state.content, preset)
+        failed = result == source
+    if doc_hash and not failed:
+        document_store.put_summary(doc_hash, preset, result)
+    return result
+
+
+def _profile_label(stage):
+    """Profile file name for the current document and stage (TAPVISION_PROFILE=1)."""
+    return f"{(st.session_state.doc_hash or 'text')[:12]}-{stage}"
+
+
+def _show_profile(profiler):
+    if profiler is not None and profiler.report_path:
+        st.caption(f"🔬 Profile saved to {profiler.report_path}")
+    elif profiler is not None and profiler.skipped:
+        st.caption("🔬 Not profiled: another session's run was being profiled.")
+
+
+def _translate_cached(text, lang_code):
+    """translate_any() backed by the document store (keyed by source text, language and preset)."""
+    preset = st.session_state.preset
+    cached = document_store.get_translation(text, lang_code, preset)
+    if cached:
+        return cached
+    result = translate_any(
+        text, lang_code, translation_models, translation_tokenizers,
+        preset=preset, memory=translation_memory,
+    )
+    if result != text:
+        document_store.put_translation(text, lang_code, preset, result, st.session_state.doc_hash)
+    return result
+
+
+def _translate_stored(doc_hash, lang_code):
+    """
+    Translate a large stored document window by window (each window is cached
+    like any other translation) and store the result as a document of its own,
+    written to the store as the windows are translated. Returns the hash of
+    the translated document.
+    """
+    result_hash = text_sha256(f"{doc_hash}\0{lang_code}\0{st.session_state.preset}")
+    if document_store.length(result_hash):
+        return result_hash   # translated before (an interrupted run leaves length 0)
+    # Each window ends with the break it was cut at: keep exactly that break between translations
+    document_store.put_pieces(
+        result_hash,
+        (_translate_cached(window, lang_code).rstrip() + window[len(window.rstrip()):]
+         for window in _windows(doc_hash)),
+        file_type="translation",
+    )
+    return result_hash
+
+
+def _speech_source():
+    """Text for text-to-speech: the latest result or, for large documents, the page being previewed."""
+    if st.session_state.processed_content:
+        return st.session_state.processed_content
+    if st.session_state.processed_hash:
+        doc_hash, page_key = st.session_state.processed_hash, "result_page"
+    elif st.session_state.large_doc:
+        doc_hash, page_key = st.session_state.doc_hash, "preview_page"
+    else:
+        return ""
+    chars = document_store.length(doc_hash) or 0
+    return document_store.read_range(doc_hash, *_page_range(st.session_state.get(page_key, 1), chars))
 
 LANGUAGE_MAP = {
     "english": "en",
@@ -112,6 +313,16 @@ if st.session_state.accessibility_mode:
     _apply_high_contrast()
     st.sidebar.success("Accessibility Mode ON — results will be spoken automatically.")
 
+# Speed / quality preset
+st.session_state.preset = st.sidebar.selectbox(
+    "⚡ Speed / Quality",
+    list(GENERATION_PRESETS),
+    index=list(GENERATION_PRESETS).index(st.session_state.preset),
+    format_func=str.capitalize,
+    help="Fast uses greedy decoding and a distilled summarizer; Best uses full beam search.",
+)
+summarizer_pipeline = load_summarizer(st.session_state.preset)
+
 st.sidebar.markdown("---")
 st.sidebar.info(
     "TapVision extracts text from any source, summarizes it, "
@@ -166,14 +377,30 @@ if input_method == "Upload File":
             st.error(f"File too large ({file_size:.1f} MB). Maximum is {MAX_SIZE_MB} MB.")
         else:
             file_type = uploaded_file.name.rsplit(".", 1)[-1].lower()
-            with st.spinner(f"Extracting text from {file_type.upper()}…"):
-                extracted = read_text(file_obj=uploaded_file, file_type=file_type)
-            if extracted:
-                st.session_state.content = extracted
-                st.session_state.processed_content = extracted
-                if st.session_state.accessibility_mode:
-                    word_count = len(extracted.split())
-                    _autoplay_tts(f"File loaded. The document contains approximately {word_count} words.")
+            upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+            # Streamlit reruns the script on every click; only extract a new upload once
+            if upload_id != st.session_state.upload_id:
+                doc_hash = file_sha256(uploaded_file)
+                if doc_hash in document_store:
+                    _open_document(doc_hash)
+                    st.caption("Loaded from the document store — this file was processed before.")
+                else:
+                    with st.spinner(f"Extracting text from {file_type.upper()}…"), extraction_slot(), \
+                            profile_document(f"{uploaded_file.name}-extract") as profiler:
+                        extracted, offsets = read_text_with_offsets(file_obj=uploaded_file, file_type=file_type)
+                    _show_profile(profiler)
+                    if extracted:
+                        document_store.put(doc_hash, extracted, offsets,
+                                           filename=uploaded_file.name, file_type=file_type)
+                        search_index.index_document(doc_hash, extracted, offsets)
+                        _open_document(doc_hash, extracted)
+                        del extracted, offsets   # from here on the store holds the only copy
+                if st.session_state.doc_hash == doc_hash:
+                    st.session_state.upload_id = upload_id
+                    if st.session_state.accessibility_mode:
+                        word_count = (len(st.session_state.content.split()) if st.session_state.content
+                                      else st.session_state.doc_chars // 6)   # ~6 characters per word
+                        _autoplay_tts(f"File loaded. The document contains approximately {word_count} words.")
 
 elif input_method == "Enter URL":
     url_input = st.text_input("Enter a URL (e.g., https://www.example.com)")
@@ -181,22 +408,48 @@ elif input_method == "Enter URL":
         if not is_internet_available():
             st.error("No internet connection detected.")
         else:
-            with st.spinner("Fetching content from URL…"):
+            with st.spinner("Fetching content from URL…"), extraction_slot():
                 extracted = read_text(url=url_input)
             if extracted:
-                st.session_state.content = extracted
-                st.session_state.processed_content = extracted
+                doc_hash = text_sha256(extracted)
+                if doc_hash not in document_store:
+                    document_store.put(doc_hash, extracted, filename=url_input, file_type="url")
+                    search_index.index_document(doc_hash, extracted)
+                _open_document(doc_hash, extracted)
                 if st.session_state.accessibility_mode:
                     _autoplay_tts(f"Page loaded. {len(extracted.split())} words extracted.")
 
 elif input_method == "Paste Text":
     pasted_text = st.text_area("Paste your text here", height=200)
     if pasted_text:
-        st.session_state.content = pasted_text.strip()
-        st.session_state.processed_content = pasted_text.strip()
+        pasted_text = pasted_text.strip()
+        doc_hash = text_sha256(pasted_text)
+        if doc_hash not in document_store:
+            document_store.put(doc_hash, pasted_text, file_type="paste")
+            search_index.index_document(doc_hash, pasted_text)
+        _open_document(doc_hash, pasted_text)
+
+# ── Search across processed documents ─────────────────────────────────────────
+with st.expander("🔎 Search processed documents"):
+    search_query = st.text_input("Find a passage", placeholder="e.g. refund policy", key="search_query")
+    if search_query:
+        hits = search_index.search(search_query, limit=5)
+        if not hits:
+            st.info("No matching passages found.")
+        for i, hit in enumerate(hits):
+            st.markdown(f"**{hit.filename or 'Untitled document'}**")
+            st.write(hit.snippet[:600] + ("…" if len(hit.snippet) > 600 else ""))
+            if st.button("Open this document", key=f"open_hit_{i}"):
+                if hit.doc_hash in document_store:
+                    _open_document(hit.doc_hash)
+                    st.rerun()
 
 # ── 2. Preview ────────────────────────────────────────────────────────────────
-if st.session_state.content:
+has_document = bool(st.session_state.content) or st.session_state.large_doc
+if st.session_state.large_doc:
+    st.subheader("2. Extracted Content")
+    _paged_preview("Content for Processing", st.session_state.doc_hash, st.session_state.doc_chars, key="preview_page")
+elif has_document:
     st.subheader("2. Extracted Content")
     st.text_area(
         "Content for Processing",
@@ -208,7 +461,7 @@ else:
     st.warning("No content yet. Upload a file, enter a URL, or paste text above.")
 
 # ── 3. Process ────────────────────────────────────────────────────────────────
-if st.session_state.content:
+if has_document:
     st.subheader("3. Process Your Content")
 
     # ── Summarisation ─────────────────────────────────────────────────────────
@@ -217,9 +470,11 @@ if st.session_state.content:
 
     with col_s1:
         if st.button("Summarize"):
-            with st.spinner("Summarizing…"):
-                result = summarize_text(st.session_state.content, summarizer_pipeline)
+            with st.spinner("Summarizing…"), profile_document(_profile_label("summarize")) as profiler:
+                result = _summarize_cached()
+            _show_profile(profiler)
             st.session_state.processed_content = result
+            st.session_state.processed_hash = None
             st.success("Done!")
             st.text_area("Summary", result, height=180, key="sum_display")
             if st.session_state.accessibility_mode:
@@ -230,8 +485,9 @@ if st.session_state.content:
             command = recognize_speech_from_mic()
             if command and any(w in command for w in ("summarize", "sumarize", "summarise")):
                 with st.spinner("Summarizing…"):
-                    result = summarize_text(st.session_state.content, summarizer_pipeline)
+                    result = _summarize_cached()
                 st.session_state.processed_content = result
+                st.session_state.processed_hash = None
                 st.success("Done!")
                 st.text_area("Summary", result, height=180, key="sum_voice_display")
                 if st.session_state.accessibility_mode:
@@ -272,17 +528,32 @@ if st.session_state.content:
             st.warning(f"'{language_input}' is not supported. Choose from: English, Hindi, French, German, Spanish.")
         else:
             st.session_state.selected_language_code = lang_code
-            source = st.session_state.processed_content or st.session_state.content
-            with st.spinner(f"Translating to {language_input.capitalize()}…"):
-                translated = translate_text(source, lang_code, translation_models, translation_tokenizers)
-            st.session_state.processed_content = translated
-            st.text_area("Translated Text", translated, height=180, key="trans_display")
-            if st.session_state.accessibility_mode:
-                _autoplay_tts(translated, lang=lang_code)
+            with st.spinner(f"Translating to {language_input.capitalize()}…"), \
+                    profile_document(_profile_label(f"translate-{lang_code}")) as profiler:
+                if st.session_state.processed_content:
+                    translated = _translate_cached(st.session_state.processed_content, lang_code)
+                else:
+                    # Large document (or a large earlier translation): translate it from the store
+                    source_hash = st.session_state.processed_hash or st.session_state.doc_hash
+                    st.session_state.processed_hash = _translate_stored(source_hash, lang_code)
+                    st.session_state.pop("result_page", None)
+                    translated = None
+            _show_profile(profiler)
+            if translated is not None:
+                st.session_state.processed_content = translated
+                st.text_area("Translated Text", translated, height=180, key="trans_display")
+                if st.session_state.accessibility_mode:
+                    _autoplay_tts(translated, lang=lang_code)
+            elif st.session_state.accessibility_mode:
+                _autoplay_tts(_speech_source(), lang=lang_code)
+
+    if st.session_state.processed_hash:
+        result_hash = st.session_state.processed_hash
+        _paged_preview("Translated Text", result_hash, document_store.length(result_hash) or 0, key="result_page")
 
     # ── Text-to-Speech ────────────────────────────────────────────────────────
     st.markdown("#### Text-to-Speech")
-    tts_source = st.session_state.processed_content or st.session_state.content
+    tts_source = _speech_source()
     col_t1, col_t2 = st.columns(2)
 
     with col_t1:
@@ -294,8 +565,9 @@ if st.session_state.content:
                 if not is_internet_available() and speech_lang != "en":
                     st.warning("No internet — falling back to English.")
                     speech_lang = "en"
-                with st.spinner("Generating audio…"):
+                with st.spinner("Generating audio…"), profile_document(_profile_label("speech")) as profiler:
                     audio_path = text_to_speech_auto(tts_source, lang=speech_lang)
+                _show_profile(profiler)
                 if audio_path and os.path.exists(audio_path):
                     st.audio(audio_path, format="audio/mp3")
                     os.remove(audio_path)
@@ -0,0 +1,216 @@
+"""
+Inbox ingestion front end for the hands-free watcher.
+
+Decides when a file dropped into the inbox is complete and ready to read:
+
+- On Linux the native observer reports close-after-write and rename events
+  (inotify IN_CLOSE_WRITE / IN_MOVED_TO, including files moved in from
+  another folder), so a file is picked up within milliseconds of the writer
+  closing it or the move completing.
+- Elsewhere, or when the native observer cannot start, files are considered
+  ready once they have been quiet (no further events, unchanged size and
+  mtime) for a short debounce period.
+- Partial downloads and editor temp files are ignored; bursts of events for
+  the same path collapse into a single callback.
+- Files already sitting in the inbox at startup are picked up too.
+- Identical content dropped twice within a short window is handed to the
+  duplicate callback instead of being processed again, including a second
+  drop under the same name.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+from store_utils import file_sha256
+
+CLOSE_DEBOUNCE  = 0.05   # coalesce the close/move events of one write burst
+QUIET_PERIOD    = 0.5    # no-close-event platforms: quiet time before a file counts as written
+CLOSE_FALLBACK  = 5.0    # close-event platforms: safety net if a close is never reported
+DEDUP_WINDOW    = 30.0   # seconds during which identical content is treated as a duplicate
+
+_TEMP_PREFIXES = (".", "~$", "~")
+_TEMP_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".tmp", ".temp", ".swp", "~")
+
+
+def is_temporary(path):
+    """True for hidden files, partial downloads and editor lock/swap files."""
+    name = os.path.basename(path).lower()
+    return name.startswith(_TEMP_PREFIXES) or name.endswith(_TEMP_SUFFIXES)
+
+
+def _identity(path):
+    """Tells a new drop under the same name apart from late events for the old one."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_ctime_ns, st.st_size
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class InboxMonitor(FileSystemEventHandler):
+    """
+    Watches `folder` and calls `on_ready(path)` once per completed file.
+    `on_duplicate(path)` (optional) receives files whose content matches a
+    file handed out within DEDUP_WINDOW seconds.
+    """
+
+    def __init__(self, folder, on_ready, on_duplicate=None):
+        self.folder       = folder
+        self.on_ready     = on_ready
+        self.on_duplicate = on_duplicate
+        self.native       = True
+
+        self._cond     = threading.Condition()
+        self._pending  = {}   # path → (deadline, stat_key or None when closed)
+        self._recent   = {}   # content hash → (time handed out, path, identity)
+        self._stopped  = False
+        self._observer = None
+        self._thread   = None
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        try:
+            # Full events turn a move in from another folder into a move event
+            # (handled as closed) instead of a create with no close to follow
+            self._observer = Observer(generate_full_events=True) if self._has_close_events else Observer()
+            self._observer.schedule(self, self.folder, recursive=False)
+            self._observer.start()
+        except OSError as e:
+            # e.g. inotify watch limit reached — fall back to polling
+            print(f"[TapVision] Native file watching unavailable ({e}); polling instead.")
+            self.native = False
+            self._observer = PollingObserver(timeout=0.5)
+            self._observer.schedule(self, self.folder, recursive=False)
+            self._observer.start()
+
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+        self.scan_existing()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def scan_existing(self):
+        """Queue files that were already in the inbox before watching started."""
+        for name in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, name)
+            if os.path.isfile(path):
+                # No close event will arrive for these; a short stability check is enough
+                self._schedule(path, closed=False, quiet=QUIET_PERIOD)
+
+    @property
+    def _has_close_events(self):
+        return self.native and sys.platform.startswith("linux")
+
+    # ── watchdog callbacks ────────────────────────────────────────────────────
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._schedule(event.src_path, closed=False)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._schedule(event.src_path, closed=False)
+
+    def on_closed(self, event):
+        if not event.is_directory:
+            self._schedule(event.src_path, closed=True)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            return
+        with self._cond:
+            self._pending.pop(event.src_path, None)
+        # A rename into place (e.g. "report.pdf.part" → "report.pdf") or a move in
+        # from another folder is atomic; a move out has no destination here
+        if event.dest_path and os.path.dirname(os.path.abspath(event.dest_path)) == os.path.abspath(self.folder):
+            self._schedule(event.dest_path, closed=True)
+
+    def on_deleted(self, event):
+        with self._cond:
+            self._pending.pop(event.src_path, None)
+
+    # ── debouncing ────────────────────────────────────────────────────────────
+
+    def _schedule(self, path, closed, quiet=None):
+        if is_temporary(path):
+            return
+        now = time.monotonic()
+        with self._cond:
+            if closed:
+                deadline, key = now + CLOSE_DEBOUNCE, None
+            else:
+                previous = self._pending.get(path)
+                if previous is not None and previous[1] is None:
+                    return   # already known to be closed; later modify events are echoes
+                if quiet is None:
+                    quiet = CLOSE_FALLBACK if self._has_close_events else QUIET_PERIOD
+                deadline, key = now + quiet, _stat_key(path)
+            self._pending[path] = (deadline, key)
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                due = [p for p, (deadline, _) in self._pending.items() if deadline <= now]
+                if not due:
+                    next_deadline = min((d for d, _ in self._pending.values()), default=None)
+                    self._cond.wait(None if next_deadline is None else max(0.0, next_deadline - now))
+                    continue
+                ready = []
+                for path in due:
+                    deadline, key = self._pending.pop(path)
+                    if key is not None and _stat_key(path) != key:
+                        # Still being written: check again after another quiet period
+                        self._pending[path] = (now + QUIET_PERIOD, _stat_key(path))
+                        continue
+                    ready.append(path)
+            for path in ready:
+                self._release(path)
+
+    def _release(self, path):
+        if not os.path.isfile(path):
+            return
+        try:
+            digest = file_sha256(path)
+        except OSError:
+            return
+        now = time.monotonic()
+        self._recent = {h: v for h, v in self._recent.items() if now - v[0] < DEDUP_WINDOW}
+        identity = _identity(path)
+        if digest in self._recent:
+            _, previous_path, previous_identity = self._recent[digest]
+            if previous_path == path and previous_identity == identity:
+                return   # a late event for a file that was already handed out
+            print(f"[TapVision] Duplicate of a file just received: {os.path.basename(path)}")
+            if self.on_duplicate is not None:
+                self.on_duplicate(path)
+            return
+        self._recent[digest] = (now, path, identity)
+        self.on_ready(path)
@@ -0,0 +1,249 @@
+"""
+Fast language identification for routing text to the right models.
+
+Non-Latin scripts (Devanagari, Arabic, Cyrillic, ...) are recognised from
+their Unicode blocks. Latin-script text is classified with a naive Bayes
+model over character trigrams, trained at import time from short built-in
+samples of each language. Scoring one paragraph is a few dictionary lookups
+per character and one small matrix product, so every chunk of a document can
+be checked: mixed-language documents are split into runs of one language
+that translation can route separately.
+"""
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from search_utils import split_spans
+
+DEFAULT_LANGUAGE = "en"   # assumed when there is too little text to tell
+MIN_LETTERS      = 20     # shorter chunks inherit the language of their neighbours
+MAX_CHARS        = 1000   # characters of a chunk that are scored
+CHUNK_WORDS      = 120    # longer paragraphs are classified in sentence groups of this size
+MIN_CHUNK_WORDS  = 25     # shorter paragraphs are grouped with the next ones
+MIN_CONFIDENCE   = 0.8    # less confident chunks take the document's language
+SAMPLE_CHARS     = 5000   # characters scored when no single chunk is confident
+
+# Unicode blocks → language for scripts used by (mostly) one supported language
+_SCRIPTS = (
+    (0x0900, 0x097F, "hi"),   # Devanagari
+    (0x0600, 0x06FF, "ar"),   # Arabic
+    (0x0400, 0x04FF, "ru"),   # Cyrillic
+    (0x0370, 0x03FF, "el"),   # Greek
+    (0x3040, 0x30FF, "ja"),   # Hiragana / Katakana
+    (0xAC00, 0xD7AF, "ko"),   # Hangul
+    (0x4E00, 0x9FFF, "zh"),   # CJK ideographs
+)
+_SCRIPT_PATTERNS = [(lang, re.compile(f"[{chr(low)}-{chr(high)}]")) for low, high, lang in _SCRIPTS]
+
+# Training samples for Latin-script languages: everyday prose rich in the
+# function words and endings that distinguish the languages.
+_SAMPLES = {
+    "en": (
+        "The document explains how the service works and what you should do if something goes wrong. "
+        "We will send you a refund within thirty days of the purchase, and you can contact our support "
+        "team at any time. This policy was updated because the law has changed. Please read the following "
+        "sections carefully, they describe your rights and the obligations of the company. If you have any "
+        "questions about this agreement, which is the whole understanding between you and us, you should "
+        "write to the address shown on the first page. They said that the weather would be better tomorrow "
+        "and that there is nothing to worry about. It is important that all of the information is correct "
+        "when you submit the form, otherwise we may not be able to process your request in time."
+    ),
+    "fr": (
+        "Le document explique comment fonctionne le service et ce que vous devez faire si quelque chose ne "
+        "va pas. Nous vous rembourserons dans les trente jours suivant l'achat, et vous pouvez contacter notre "
+        "équipe d'assistance à tout moment. Cette politique a été mise à jour parce que la loi a changé. "
+        "Veuillez lire attentivement les sections suivantes, elles décrivent vos droits et les obligations de "
+        "la société. Si vous avez des questions sur cet accord, qui constitue l'intégralité de l'entente entre "
+        "vous et nous, écrivez à l'adresse indiquée sur la première page. Ils ont dit que le temps serait "
+        "meilleur demain et qu'il n'y a pas de quoi s'inquiéter. Il est important que toutes les informations "
+        "soient correctes lorsque vous envoyez le formulaire, sinon nous ne pourrons pas traiter votre demande."
+    ),
+    "de": (
+        "Das Dokument erklärt, wie der Dienst funktioniert und was Sie tun sollten, wenn etwas schiefgeht. "
+        "Wir erstatten Ihnen den Betrag innerhalb von dreißig Tagen nach dem Kauf, und Sie können unser "
+        "Support-Team jederzeit kontaktieren. Diese Richtlinie wurde aktualisiert, weil sich das Gesetz "
+        "geändert hat. Bitte lesen Sie die folgenden Abschnitte sorgfältig, sie beschreiben Ihre Rechte und "
+        "die Pflichten des Unternehmens. Wenn Sie Fragen zu dieser Vereinbarung haben, die die gesamte "
+        "Übereinkunft zwischen Ihnen und uns darstellt, schreiben Sie an die Adresse auf der ersten Seite. "
+        "Sie sagten, dass das Wetter morgen besser sein würde und dass es nichts zu befürchten gibt. Es ist "
+        "wichtig, dass alle Angaben richtig sind, wenn Sie das Formular absenden, sonst können wir Ihre "
+        "Anfrage nicht rechtzeitig bearbeiten."
+    ),
+    "es": (
+        "El documento explica cómo funciona el servicio y qué debe hacer si algo sale mal. Le devolveremos "
+        "el dinero en un plazo de treinta días desde la compra, y puede ponerse en contacto con nuestro equipo "
+        "de asistencia en cualquier momento. Esta política se actualizó porque la ley ha cambiado. Por favor, "
+        "lea atentamente las siguientes secciones, que describen sus derechos y las obligaciones de la empresa. "
+        "Si tiene alguna pregunta sobre este acuerdo, que constituye el entendimiento completo entre usted y "
+        "nosotros, escriba a la dirección que aparece en la primera página. Dijeron que el tiempo sería mejor "
+        "mañana y que no hay nada de qué preocuparse. Es importante que toda la información sea correcta cuando "
+        "envíe el formulario, de lo contrario no podremos tramitar su solicitud a tiempo."
+    ),
+    "it": (
+        "Il documento spiega come funziona il servizio e che cosa dovete fare se qualcosa va storto. Vi "
+        "rimborseremo entro trenta giorni dall'acquisto, e potete contattare il nostro gruppo di assistenza in "
+        "qualsiasi momento. Questa politica è stata aggiornata perché la legge è cambiata. Vi preghiamo di "
+        "leggere attentamente le sezioni seguenti, che descrivono i vostri diritti e gli obblighi della società. "
+        "Se avete domande su questo accordo, che costituisce l'intera intesa tra voi e noi, scrivete "
+        "all'indirizzo indicato nella prima pagina. Hanno detto che il tempo sarebbe stato migliore domani e "
+        "che non c'è niente di cui preoccuparsi. È importante che tutte le informazioni siano corrette quando "
+        "inviate il modulo, altrimenti non potremo elaborare la vostra richiesta in tempo."
+    ),
+    "pt": (
+        "O documento explica como funciona o serviço e o que você deve fazer se algo der errado. Faremos o "
+        "reembolso no prazo de trinta dias após a compra, e você pode entrar em contato com a nossa equipe de "
+        "suporte a qualquer momento. Esta política foi atualizada porque a lei mudou. Por favor, leia com "
+        "atenção as seções seguintes, elas descrevem os seus direitos e as obrigações da empresa. Se tiver "
+        "alguma dúvida sobre este acordo, que constitui o entendimento integral entre você e nós, escreva para "
+        "o endereço indicado na primeira página. Eles disseram que o tempo estaria melhor amanhã e que não há "
+        "nada com que se preocupar. É importante que todas as informações estejam corretas quando você enviar "
+        "o formulário, caso contrário não poderemos processar o seu pedido a tempo."
+    ),
+    "nl": (
+        "Het document legt uit hoe de dienst werkt en wat u moet doen als er iets misgaat. Wij betalen het "
+        "bedrag binnen dertig dagen na de aankoop terug, en u kunt op elk moment contact opnemen met ons "
+        "ondersteuningsteam. Dit beleid is bijgewerkt omdat de wet is veranderd. Lees de volgende gedeelten "
+        "zorgvuldig, ze beschrijven uw rechten en de verplichtingen van het bedrijf. Als u vragen heeft over "
+        "deze overeenkomst, die de volledige afspraak tussen u en ons is, schrijf dan naar het adres op de "
+        "eerste pagina. Ze zeiden dat het weer morgen beter zou zijn en dat er niets is om je zorgen over te "
+        "maken. Het is belangrijk dat alle gegevens juist zijn wanneer u het formulier verstuurt, anders "
+        "kunnen wij uw aanvraag niet op tijd behandelen."
+    ),
+}
+
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+_LETTER      = re.compile(r"[^\W\d_]")
+
+
+def _trigrams(text, max_chars=MAX_CHARS):
+    """Character trigrams of each word, padded with spaces so word starts and ends count."""
+    padded = " " + " ".join(_NON_LETTERS.sub(" ", text[:max_chars].lower()).split()) + " "
+    grams = Counter(map("".join, zip(padded, padded[1:], padded[2:])))
+    # Drop trigrams that straddle two words ("d w")
+    for gram in [g for g in grams if g[1] == " "]:
+        del grams[gram]
+    return grams
+
+
+def _train(samples):
+    languages = sorted(samples)
+    counts = {lang: _trigrams(samples[lang]) for lang in languages}
+    vocab = {gram: i for i, gram in enumerate(sorted(set().union(*counts.values())))}
+    # Log-probabilities with add-one smoothing; column j is languages[j]
+    log_probs = np.empty((len(vocab) + 1, len(languages)))
+    for j, lang in enumerate(languages):
+        total = sum(counts[lang].values()) + len(vocab) + 1
+        column = np.ones(len(vocab) + 1)
+        for gram, count in counts[lang].items():
+            column[vocab[gram]] += count
+        log_probs[:, j] = np.log(column / total)
+    return languages, vocab, log_probs
+
+
+_LANGUAGES, _VOCAB, _LOG_PROBS = _train(_SAMPLES)
+_UNSEEN = len(_VOCAB)   # row shared by trigrams that no sample contains
+
+
+# --- Detection ---
+def _script_language(text, letters):
+    """Language implied by a dominant non-Latin script, or None."""
+    if text.isascii():
+        return None
+    counts = Counter({lang: len(pattern.findall(text)) for lang, pattern in _SCRIPT_PATTERNS})
+    lang, count = counts.most_common(1)[0]
+    if count < letters / 2:
+        return None
+    if lang == "zh" and counts["ja"]:
+        return "ja"   # Japanese mixes kanji with kana
+    return lang
+
+
+def detect_language(text, max_chars=MAX_CHARS):
+    """
+    Returns (language code, confidence) for a piece of text, e.g. ("fr", 0.97).
+    Returns (None, 0.0) if there are fewer than MIN_LETTERS letters.
+    Only the first max_chars characters are scored.
+    """
+    sample = text[:max_chars]
+    letters = len(_LETTER.findall(sample))
+    if letters < MIN_LETTERS:
+        return None, 0.0
+    script = _script_language(sample, letters)
+    if script:
+        return script, 1.0
+    grams = _trigrams(text, max_chars)
+    rows = np.fromiter((_VOCAB.get(g, _UNSEEN) for g in grams), dtype=np.int64, count=len(grams))
+    weights = np.fromiter(grams.values(), dtype=np.float64, count=len(grams))
+    scores = weights @ _LOG_PROBS[rows]
+    # Posterior of the best language, tempered by the number of trigrams
+    scaled = (scores - scores.max()) / max(1.0, math.sqrt(weights.sum()))
+    probs = np.exp(scaled) / np.exp(scaled).sum()
+    best = int(np.argmax(probs))
+    return _LANGUAGES[best], float(probs[best])
+
+
+def _group_spans(text, max_words):
+    """Paragraph spans, with runs of short paragraphs grouped until they reach MIN_CHUNK_WORDS."""
+    group_start = group_end = None
+    words = 0
+    for start, end in split_spans(text, max_words=max_words):
+        if group_start is None:
+            group_start, words = start, 0
+        group_end = end
+        words += text.count(" ", start, end) + 1
+        if words >= MIN_CHUNK_WORDS:
+            yield group_start, group_end
+            group_start = None
+    if group_start is not None:
+        yield group_start, group_end
+
+
+def document_language(text, chunks=(), default=DEFAULT_LANGUAGE, min_confidence=MIN_CONFIDENCE):
+    """
+    The main language of a document: the language covering most characters
+    among confidently classified chunks (start, end, lang, confidence), else
+    that of a longer sample of the text if it is confident, else `default`.
+    """
+    sizes = Counter()
+    for start, end, lang, confidence in chunks:
+        if lang and confidence >= min_confidence:
+            sizes[lang] += end - start
+    if sizes:
+        return sizes.most_common(1)[0][0]
+    lang, confidence = detect_language(text, max_chars=SAMPLE_CHARS)
+    return lang if lang and confidence >= min_confidence else default
+
+
+def split_by_language(text, default=DEFAULT_LANGUAGE, max_words=CHUNK_WORDS, min_confidence=MIN_CONFIDENCE):
+    """
+    Split text into runs of a single language.
+    Each paragraph (or group of short paragraphs, or sentence group of at
+    most max_words words in a long paragraph) is classified on its own, but
+    only chunks classified with at least min_confidence keep their own
+    language; all others (too short, headings, code, numbers) take the
+    document's language (see document_language). Returns a list of
+    (language, start, end) character ranges covering the text in order;
+    adjacent chunks in the same language are merged.
+    """
+    chunks = [(start, end, *detect_language(text[start:end]))
+              for start, end in _group_spans(text, max_words)]
+    main = document_language(text, chunks, default, min_confidence)
+
+    runs = []
+    for start, end, lang, confidence in chunks:
+        if not lang or confidence < min_confidence:
+            lang = main
+        if runs and runs[-1][0] == lang:
+            runs[-1] = (lang, runs[-1][1], end)
+        else:
+            runs.append((lang, start, end))
+    return runs
+
+
+if __name__ == "__main__":
+    import sys
+    sample = " ".join(sys.argv[1:]) or sys.stdin.read()
+    print(detect_language(sample))
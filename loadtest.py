@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+TapVision load generator
+========================
+Reproduces production load on the web app and the hands-free watcher so
+concurrency and caching changes can be checked before they ship.
+
+  python loadtest.py app --users 8 --iterations 3
+      Concurrent Streamlit sessions (driven through streamlit's AppTest API)
+      each paste a document, summarize it and translate the summary.
+
+  python loadtest.py watcher --bursts 3 --burst-size 20
+      Bursts of synthetic files dropped into a temporary inbox that a real
+      watcher pipeline (inbox monitor, job queue, store, index) processes.
+
+Speech input and output are always stubbed. By default the real models are
+used; --fake-models swaps in stand-ins with a fixed per-call latency so the
+harness measures TapVision's own queueing, caching and locking.
+
+Reports p50 / p95 / p99 latency per stage, throughput and peak memory.
+--json writes the numbers for CI, and --max-p95 stage=seconds (repeatable)
+turns the run into a regression gate: the exit code is 1 if any limit is
+exceeded. All state (store, queue, inbox) lives in a temporary directory.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_WORDS = (
+    "refund policy customer account payment service update notice privacy data contract "
+    "period month year request support team agreement section change access document "
+    "information delivery order price product warranty return claim report office staff"
+).split()
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+class Metrics:
+    """Thread-safe per-stage latency samples plus a peak-RSS sampler."""
+
+    def __init__(self):
+        self.samples   = defaultdict(list)
+        self.peak_rss  = 0
+        self._lock     = threading.Lock()
+        self._stop     = threading.Event()
+        self._sampler  = threading.Thread(target=self._sample_rss, daemon=True)
+        self._started  = None
+        self.wall      = 0.0
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self.wall = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample_rss(self):
+        while True:
+            self.peak_rss = max(self.peak_rss, _current_rss())
+            if self._stop.wait(0.1):
+                return
+
+    def summary(self, completed):
+        stages = {}
+        for stage, values in sorted(self.samples.items()):
+            values = sorted(values)
+            stages[stage] = {
+                "count": len(values),
+                "p50":   _percentile(values, 50),
+                "p95":   _percentile(values, 95),
+                "p99":   _percentile(values, 99),
+                "max":   values[-1],
+            }
+        return {
+            "wall_seconds":    self.wall,
+            "completed":       completed,
+            "throughput_per_s": completed / self.wall if self.wall else 0.0,
+            "peak_rss_mb":     self.peak_rss / 2**20,
+            "stages":          stages,
+        }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _current_rss():
+    """Resident set size in bytes (falls back to the lifetime peak off Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def print_report(title, report):
+    print(f"\n{title}")
+    print(f"  completed {report['completed']} in {report['wall_seconds']:.1f}s  "
+          f"→ {report['throughput_per_s']:.2f}/s   peak RSS {report['peak_rss_mb']:.0f} MB")
+    print(f"  {'stage':<14}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, s in report["stages"].items():
+        print(f"  {stage:<14}{s['count']:>6}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}{s['max']:>10.3f}")
+
+
+# ── Synthetic input ──────────────────────────────────────────────────────────
+
+def synthetic_text(words, seed):
+    """English-looking prose of roughly `words` words; unique per seed."""
+    rng = random.Random(seed)
+    sentences = [f"Document {seed} begins here."]
+    count = 4
+    while count < words:
+        length = rng.randint(8, 20)
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        count += length
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs)
+
+
+# ── Stubs ─────────────────────────────────────────────────────────────────────
+
+class _FakeTokenizer:
+    """Stands in for a MarianTokenizer; "tokens" are the strings themselves."""
+
+    def __call__(self, batch, **kwargs):
+        return {"input_ids": list(batch)}
+
+    def encode(self, text, **kwargs):
+        return [text]
+
+    def decode(self, tokens, **kwargs):
+        return tokens
+
+    def batch_decode(self, batch, **kwargs):
+        return list(batch)
+
+
+class _FakeMarian:
+    def __init__(self, lang, latency):
+        self.lang    = lang
+        self.latency = latency
+
+    def generate(self, inputs=None, input_ids=None, **kwargs):
+        batch = inputs if inputs is not None else input_ids
+        time.sleep(self.latency * len(batch))
+        return [f"[{self.lang}] {text}" for text in batch]
+
+
+def _fake_summarizer(latency):
+    def summarize(text, max_length=150, **kwargs):
+        time.sleep(latency)
+        return [{"summary_text": " ".join(text.split()[:60])}]
+    return summarize
+
+
+def install_stubs(fake_models, latency):
+    """Silence speech I/O and, optionally, replace the models with fast stand-ins."""
+    import speech_utils
+
+    speech_utils.speak_now = lambda text, lang="en": None
+    speech_utils.recognize_speech_from_mic = lambda *args, **kwargs: None
+    speech_utils.text_to_speech_auto = lambda *args, **kwargs: None
+
+    if fake_models:
+        import nlp_utils
+        langs = list(nlp_utils.TRANSLATION_MODEL_NAMES)
+        fakes = (
+            {"en": None, **{lang: _FakeMarian(lang, latency) for lang in langs}},
+            {"en": None, **{lang: _FakeTokenizer() for lang in langs}},
+        )
+        nlp_utils.load_translation_models = lambda: fakes
+        nlp_utils.load_summarizer = lambda preset=None: _fake_summarizer(latency)
+        nlp_utils.load_translation_pair = lambda src, tgt: (_FakeMarian(f"{src}>{tgt}", latency), _FakeTokenizer())
+
+
+# ── Web app load ──────────────────────────────────────────────────────────────
+
+def _run_app_user(user, iterations, words, language, metrics, errors):
+    from streamlit.testing.v1 import AppTest
+
+    def timed(stage, action):
+        started = time.perf_counter()
+        at = action()
+        metrics.record(stage, time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"{stage}: {at.exception[0].value}")
+        if at.error:   # the app reports model failures with st.error
+            raise RuntimeError(f"{stage}: {at.error[0].value}")
+        return at
+
+    def button(at, label):
+        return next(b for b in at.button if b.label == label)
+
+    for i in range(iterations):
+        try:
+            session_start = time.perf_counter()
+            at = AppTest.from_file(os.path.join(HERE, "app.py"), default_timeout=600)
+            timed("load", at.run)
+            timed("input", lambda: at.radio(key="input_method").set_value("Paste Text").run())
+            paste = next(t for t in at.text_area if t.label == "Paste your text here")
+            text = synthetic_text(words, seed=user * 10_000 + i)
+            timed("ingest", lambda: paste.set_value(text).run())
+            timed("summarize", lambda: button(at, "Summarize").click().run())
+            at.text_input(key="lang_input").set_value(language)
+            timed("translate", lambda: button(at, "Translate").click().run())
+            metrics.record("session", time.perf_counter() - session_start)
+        except Exception as e:
+            errors.append(f"user {user}: {e!r}")
+
+
+def _serialize_ast_parse():
+    """
+    Streamlit parses the script on every rerun; concurrent ast.parse calls
+    can corrupt the parser state on CPython < 3.12, so take turns.
+    """
+    import ast
+    parse, lock = ast.parse, threading.Lock()
+
+    def locked_parse(*args, **kwargs):
+        with lock:
+            return parse(*args, **kwargs)
+    ast.parse = locked_parse
+
+
+def run_app_load(users, iterations, words, language, fake_models, latency):
+    install_stubs(fake_models, latency)
+    if sys.version_info < (3, 12):
+        _serialize_ast_parse()
+    metrics = Metrics().start()
+    errors = []
+    threads = [
+        threading.Thread(target=_run_app_user, args=(u, iterations, words, language, metrics, errors))
+        for u in range(users)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    metrics.stop()
+    for error in errors[:10]:
+        print(f"[TapVision] {error}")
+    return metrics.summary(completed=len(metrics.samples["session"])), errors
+
+
+# ── Watcher load ──────────────────────────────────────────────────────────────
+
+class _ScriptedListener:
+    """Answers every voice menu with the same commands instead of a microphone."""
+
+    def __init__(self, commands):
+        self.commands = commands
+        self._local   = threading.local()
+
+    def is_running(self):
+        return True
+
+    def clear(self):
+        self._local.pending = list(self.commands)
+
+    def get_command(self, timeout=None):
+        pending = getattr(self._local, "pending", None)
+        return pending.pop(0) if pending else "done"
+
+
+def run_watcher_load(bursts, burst_size, burst_interval, words, commands, fake_models, latency, timeout):
+    install_stubs(fake_models, latency)
+    import watcher
+    from inbox_utils import InboxMonitor
+    from queue_utils import JobQueue
+    from reading_utils import ReadingPositions
+    from search_utils import SearchIndex
+    from store_utils import DocumentStore
+    from tm_utils import TranslationMemory
+
+    root = tempfile.mkdtemp(prefix="tapvision-load-")
+    watcher.INBOX_FOLDER     = os.path.join(root, "inbox")
+    watcher.PROCESSED_FOLDER = os.path.join(root, "processed")
+    watcher.ERROR_FOLDER     = os.path.join(root, "errors")
+    watcher.speak_now = lambda text, lang="en": None
+    os.makedirs(watcher.INBOX_FOLDER)
+
+    import nlp_utils
+    summarizer = nlp_utils.load_summarizer(watcher.SUMMARY_PRESET)
+    models, tokenizers = nlp_utils.load_translation_models()
+    store = DocumentStore(os.path.join(root, "store.db"))
+
+    metrics  = Metrics()
+    written  = {}                 # path → time the file was closed
+    marks    = defaultdict(dict)  # path → stage → timestamp
+    done     = threading.Event()
+    expected = bursts * burst_size
+
+    class InstrumentedHandler(watcher.TapVisionHandler):
+        def submit(self, filepath):
+            marks[filepath]["submitted"] = time.perf_counter()
+            super().submit(filepath)
+
+        def _prepare(self, filepath):
+            started = time.perf_counter()
+            marks[filepath]["prepare"] = started
+            try:
+                return super()._prepare(filepath)
+            finally:
+                metrics.record("prepare", time.perf_counter() - started)
+
+        def _present(self, doc, profiler=None):
+            started = time.perf_counter()
+            try:
+                return super()._present(doc, profiler)
+            finally:
+                metrics.record("present", time.perf_counter() - started)
+
+        def _summarize(self, doc_hash, text, preset):
+            started = time.perf_counter()
+            try:
+                return super()._summarize(doc_hash, text, preset)
+            finally:
+                metrics.record("summarize", time.perf_counter() - started)
+
+    jobs = JobQueue(os.path.join(root, "jobs.db"))
+    complete = jobs.complete
+
+    def timed_complete(job_id):
+        complete(job_id)
+        path = jobs._conn.execute("SELECT path FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        now = time.perf_counter()
+        mark = marks[path]
+        metrics.record("detect", mark["submitted"] - written[path])
+        metrics.record("queue_wait", mark["prepare"] - mark["submitted"])
+        metrics.record("end_to_end", now - written[path])
+        if len(metrics.samples["end_to_end"]) >= expected:
+            done.set()
+
+    jobs.complete = timed_complete
+
+    handler = InstrumentedHandler(
+        summarizer, models, tokenizers, store, SearchIndex(store), ReadingPositions(store),
+        _ScriptedListener(commands), jobs, TranslationMemory(store),
+    ).start()
+    monitor = InboxMonitor(watcher.INBOX_FOLDER, handler.submit, handler.skip_duplicate).start()
+
+    metrics.start()
+    seed = 0
+    for burst in range(bursts):
+        for _ in range(burst_size):
+            path = os.path.join(watcher.INBOX_FOLDER, f"load_{seed:05d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(synthetic_text(words, seed))
+            written[path] = time.perf_counter()
+            seed += 1
+        if burst < bursts - 1:
+            time.sleep(burst_interval)
+
+    finished = done.wait(timeout)
+    metrics.stop()
+    monitor.stop()
+    if not finished:
+        print(f"[TapVision] Timed out: {len(metrics.samples['end_to_end'])} of {expected} files finished.")
+    errors = [] if finished else ["timeout"]
+    return metrics.summary(completed=len(metrics.samples["end_to_end"])), errors
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def _check_limits(report, limits):
+    failures = []
+    for limit in limits:
+        stage, _, seconds = limit.partition("=")
+        stats = report["stages"].get(stage)
+        if stats is None:
+            failures.append(f"no samples for stage '{stage}'")
+        elif stats["p95"] > float(seconds):
+            failures.append(f"{stage} p95 {stats['p95']:.3f}s > {float(seconds):.3f}s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the TapVision app or watcher.")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    app = sub.add_parser("app", help="concurrent Streamlit sessions")
+    app.add_argument("--users", type=int, default=4)
+    app.add_argument("--iterations", type=int, default=2, help="documents per user")
+    app.add_argument("--language", default="french")
+
+    inbox = sub.add_parser("watcher", help="bursts of files into a temporary inbox")
+    inbox.add_argument("--bursts", type=int, default=3)
+    inbox.add_argument("--burst-size", type=int, default=10)
+    inbox.add_argument("--burst-interval", type=float, default=2.0, help="seconds between bursts")
+    inbox.add_argument("--commands", default="done", help="comma-separated voice commands per file")
+    inbox.add_argument("--timeout", type=float, default=1800)
+
+    for p in (app, inbox):
+        p.add_argument("--words", type=int, default=600, help="words per synthetic document")
+        p.add_argument("--fake-models", action="store_true", help="replace models with fixed-latency stand-ins")
+        p.add_argument("--fake-latency", type=float, default=0.05, help="seconds per fake model call")
+        p.add_argument("--json", help="write the report to this file")
+        p.add_argument("--max-p95", action="append", default=[], metavar="STAGE=SECONDS",
+                       help="fail if the stage's p95 latency exceeds the limit")
+    args = parser.parse_args()
+
+    # Keep the load test's documents, jobs and caches out of the real ~/TapVision
+    scratch = tempfile.mkdtemp(prefix="tapvision-store-")
+    os.environ.setdefault("TAPVISION_STORE", os.path.join(scratch, "store.db"))
+    sys.path.insert(0, HERE)
+
+    if args.target == "app":
+        report, errors = run_app_load(args.users, args.iterations, args.words, args.language,
+                                      args.fake_models, args.fake_latency)
+        print_report(f"Web app: {args.users} users × {args.iterations} documents", report)
+    else:
+        commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+        report, errors = run_watcher_load(args.bursts, args.burst_size, args.burst_interval, args.words,
+                                          commands, args.fake_models, args.fake_latency, args.timeout)
+        print_report(f"Watcher: {args.bursts} bursts × {args.burst_size} files", report)
+
+    report["errors"] = errors
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = _check_limits(report, args.max_p95)
+    for failure in failures:
+        print(f"FAIL  {failure}")
+    sys.exit(1 if failures or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
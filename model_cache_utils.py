@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk model weights for multi-process deployments.
+
+Normally every Streamlit worker process loads its own copy of BART and the
+MarianMT models, so RAM grows with each worker. In shared mode
+(TAPVISION_SHARED_MODELS=1) weights are instead read from a pre-converted
+safetensors cache and mapped straight into memory: every parameter tensor is
+a view onto a read-only mapping of the cache file, so all processes on the
+host share the same physical pages through the OS page cache. A new worker
+costs little more than its Python interpreter.
+
+    python model_cache_utils.py --convert        # once per host (downloads + converts)
+    python model_cache_utils.py --warm           # pre-fault the cache into the page cache
+    python model_cache_utils.py --serve 4        # convert, warm, start 4 Streamlit workers
+
+Workers started with --serve listen on consecutive ports (8501, 8502, ...);
+put any HTTP load balancer with sticky sessions in front of them.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+
+SHARED_MODELS = os.environ.get("TAPVISION_SHARED_MODELS", "0") == "1"
+MODEL_CACHE_DIR = os.environ.get(
+    "TAPVISION_MODEL_CACHE",
+    os.path.expanduser("~/TapVision/models"),
+)
+WEIGHTS_FILE = "model.safetensors"
+
+# safetensors dtype names → torch dtype attribute names
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def cache_path(model_name):
+    """Directory holding the converted copy of a Hugging Face model."""
+    return os.path.join(MODEL_CACHE_DIR, model_name.replace("/", "--"))
+
+
+def is_converted(model_name):
+    return os.path.exists(os.path.join(cache_path(model_name), WEIGHTS_FILE))
+
+
+def default_models():
+    """Every model the app and watcher load at startup."""
+    from nlp_utils import GENERATION_PRESETS, TRANSLATION_MODEL_NAMES
+    summarizers = {preset["summarizer_model"] for preset in GENERATION_PRESETS.values()}
+    return sorted(summarizers) + sorted(TRANSLATION_MODEL_NAMES.values())
+
+
+# --- Conversion ---
+def convert_model(model_name):
+    """
+    Download a model and save it to the cache as a single safetensors file
+    (plus config and tokenizer). Runs once per host; workers only read it.
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    target = cache_path(model_name)
+    if is_converted(model_name):
+        return target
+    tmp = f"{target}.tmp{os.getpid()}"
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.save_pretrained(tmp, safe_serialization=True, max_shard_size="100GB")
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp)
+    try:
+        os.replace(tmp, target)   # atomic: workers never see a half-written cache
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)   # another worker converted it first
+    print(f"[TapVision] Converted {model_name} → {target}")
+    return target
+
+
+# --- Memory-mapped loading ---
+def _read_header(path):
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    header.pop("__metadata__", None)
+    return header, 8 + length
+
+
+def load_mapped_state_dict(path):
+    """
+    Returns {name: tensor} for a safetensors file without copying the data:
+    one private, read-only file mapping backs every tensor, so the pages stay
+    shared with every other process mapping the same file.
+    """
+    import torch
+
+    header, data_start = _read_header(path)
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    state = {}
+    for name, info in header.items():
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        offset = data_start + begin
+        if offset % itemsize or end == begin:
+            # Unaligned or empty tensor (rare): fall back to a private copy
+            with open(path, "rb") as f:
+                f.seek(offset)
+                raw = bytearray(f.read(end - begin))
+            state[name] = torch.frombuffer(raw, dtype=dtype).reshape(info["shape"]) if raw \
+                else torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, offset // itemsize, info["shape"])
+        state[name] = tensor
+    return state
+
+
+def load_shared_model(model_name):
+    """
+    Load (model, tokenizer) for a seq2seq model from the shared cache.
+    The model skeleton is built on the meta device, so no memory is allocated
+    for random initial weights, and the mapped tensors are assigned as its
+    parameters directly. Models missing from the cache are converted first;
+    falls back to a normal load if the model has state the cache does not cover.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+    path = convert_model(model_name)   # no-op when already converted
+    config = AutoConfig.from_pretrained(path)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+    model.load_state_dict(load_mapped_state_dict(os.path.join(path, WEIGHTS_FILE)), strict=False, assign=True)
+    model.tie_weights()   # e.g. lm_head shares the embedding matrix; stored once in the file
+
+    leftover = [name for name, t in list(model.named_parameters()) + list(model.named_buffers()) if t.is_meta]
+    # Fixed sinusoidal position tables (Marian) are not stored; rebuild them from the config
+    computed = {name.rsplit(".", 1)[0] for name in leftover}
+    if computed and all("Sinusoidal" in type(model.get_submodule(m)).__name__ for m in computed):
+        for module_name in computed:
+            module = model.get_submodule(module_name)
+            module.to_empty(device="cpu", recurse=False)
+            model._init_weights(module)
+        leftover = []
+    if leftover:
+        print(f"[TapVision] Shared cache for {model_name} does not cover {leftover[:3]}; loading a private copy.")
+        return AutoModelForSeq2SeqLM.from_pretrained(path), AutoTokenizer.from_pretrained(path)
+
+    model.eval()
+    model.requires_grad_(False)   # inference only: pages are never written, so never copied
+    return model, AutoTokenizer.from_pretrained(path)
+
+
+# --- Warm start ---
+def warm_cache(model_names=None):
+    """
+    Read the cached weight files into the OS page cache so the first worker
+    request does not wait on disk. Later workers map pages that are already
+    resident. Returns the number of bytes warmed.
+    """
+    total = 0
+    for name in model_names or default_models():
+        path = os.path.join(cache_path(name), WEIGHTS_FILE)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Touch one byte per page; cheaper than reading the whole file into Python
+                for offset in range(0, size, mmap.PAGESIZE):
+                    mm[offset]
+        total += size
+    return total
+
+
+# --- Deployment ---
+def serve(workers, port=8501):
+    """Convert and warm the cache, then run `workers` Streamlit processes sharing it."""
+    for name in default_models():
+        convert_model(name)
+    started = time.perf_counter()
+    warmed = warm_cache()
+    print(f"[TapVision] Warmed {warmed / 2**20:.0f} MB in {time.perf_counter() - started:.1f}s")
+
+    env = dict(os.environ, TAPVISION_SHARED_MODELS="1")
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", app,
+             "--server.port", str(port + i), "--server.headless", "true"],
+            env=env,
+        )
+        for i in range(workers)
+    ]
+    print(f"[TapVision] {workers} worker(s) on ports {port}-{port + workers - 1}")
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared model cache for multi-process TapVision.")
+    parser.add_argument("--convert", action="store_true", help="download and convert all models")
+    parser.add_argument("--warm", action="store_true", help="load the cache into the page cache")
+    parser.add_argument("--serve", type=int, metavar="N", help="start N Streamlit workers")
+    parser.add_argument("--port", type=int, default=8501)
+    args = parser.parse_args()
+
+    if args.convert:
+        for name in default_models():
+            convert_model(name)
+    if args.warm:
+        print(f"Warmed {warm_cache() / 2**20:.0f} MB")
+    if args.serve:
+        serve(args.serve, args.port)
+    if not (args.convert or args.warm or args.serve):
+        for name in default_models():
+            print(f"{'converted' if is_converted(name) else 'missing  '}  {name}")
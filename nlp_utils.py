@@ -1,27 +1,66 @@
+import re
+
+import numpy as np
 import streamlit as st
 from transformers import MarianMTModel, MarianTokenizer, pipeline
 
+from langid_utils import split_by_language
+from model_cache_utils import SHARED_MODELS, load_shared_model
+
+# --- Generation Presets ---
+# Speed/quality trade-offs selectable per call. "best" matches the original
+# behaviour (BART-large-CNN with its default beam search, 4-beam translation).
+GENERATION_PRESETS = {
+    "fast": {
+        "summarizer_model":  "sshleifer/distilbart-cnn-12-6",
+        "summary_beams":     1,      # greedy decoding
+        "translation_beams": 1,
+    },
+    "balanced": {
+        "summarizer_model":  "facebook/bart-large-cnn",
+        "summary_beams":     2,
+        "translation_beams": 2,
+    },
+    "best": {
+        "summarizer_model":  "facebook/bart-large-cnn",
+        "summary_beams":     4,
+        "translation_beams": 4,
+    },
+}
+DEFAULT_PRESET = "best"
+
+
+def get_preset(name=None):
+    """Returns the generation settings for a preset name, falling back to the default."""
+    return GENERATION_PRESETS.get((name or DEFAULT_PRESET).lower(), GENERATION_PRESETS[DEFAULT_PRESET])
+
+
 # --- Translation Functions ---
+TRANSLATION_MODEL_NAMES = {
+    "hi": "Helsinki-NLP/opus-mt-en-hi",
+    "fr": "Helsinki-NLP/opus-mt-en-fr",
+    "de": "Helsinki-NLP/opus-mt-en-de",
+    "es": "Helsinki-NLP/opus-mt-en-es",
+}
+
+
+def _load_marian(name):
+    """(model, tokenizer) for a MarianMT model; from the shared memory-mapped cache in shared mode."""
+    if SHARED_MODELS:
+        return load_shared_model(name)
+    return MarianMTModel.from_pretrained(name), MarianTokenizer.from_pretrained(name)
+
+
 @st.cache_resource
 def load_translation_models():
     """
     Loads MarianMT translation models and tokenizers for English to other languages.
     Models are cached to avoid re-loading on every rerun.
     """
-    translation_models = {
-        "en": None,  # No translation needed for English
-        "hi": MarianMTModel.from_pretrained("Helsinki-NLP/opus-mt-en-hi"),
-        "fr": MarianMTModel.from_pretrained("Helsinki-NLP/opus-mt-en-fr"),
-        "de": MarianMTModel.from_pretrained("Helsinki-NLP/opus-mt-en-de"),
-        "es": MarianMTModel.from_pretrained("Helsinki-NLP/opus-mt-en-es"),
-    }
-    translation_tokenizers = {
-        "en": None,
-        "hi": MarianTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-hi"),
-        "fr": MarianTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-fr"),
-        "de": MarianTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-de"),
-        "es": MarianTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-es"),
-    }
+    translation_models = {"en": None}  # No translation needed for English
+    translation_tokenizers = {"en": None}
+    for lang, name in TRANSLATION_MODEL_NAMES.items():
+        translation_models[lang], translation_tokenizers[lang] = _load_marian(name)
     return translation_models, translation_tokenizers
 
 
@@ -31,10 +70,66 @@ def _chunk_text(text, max_words=350):
     return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
 
 
-def translate_text(text, target_lang, models, tokenizers):
+TRANSLATION_BATCH_SIZE = 16
+# Marian's position limit, for every preset: a 350-word chunk needs ~450+ output
+# tokens, so presets trade speed through beams only, never through the length cap
+TRANSLATION_MAX_LENGTH = 512
+
+
+def _translate_batch(segments, model, tokenizer, settings):
+    """Translate a list of segments with batched generate() calls."""
+    translated = []
+    for i in range(0, len(segments), TRANSLATION_BATCH_SIZE):
+        batch = segments[i:i + TRANSLATION_BATCH_SIZE]
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=TRANSLATION_MAX_LENGTH)
+        tokens = model.generate(
+            **inputs,
+            max_length=TRANSLATION_MAX_LENGTH,
+            num_beams=settings["translation_beams"],
+            early_stopping=settings["translation_beams"] > 1,
+        )
+        translated.extend(tokenizer.batch_decode(tokens, skip_special_tokens=True))
+    return translated
+
+
+def _marian_translate(text, model, tokenizer, settings, memory=None, memory_lang=None, preset=None):
+    """Translate text with one Marian model, through the translation memory when given."""
+    if memory is not None:
+        preset_name = (preset or DEFAULT_PRESET).lower()
+        sentences = [piece for sentence in split_sentences(text)
+                     for piece in _chunk_text(sentence, max_words=350)]
+        results = [memory.lookup(sentence, memory_lang, preset_name) for sentence in sentences]
+        novel = list(dict.fromkeys(s for s, r in zip(sentences, results) if r is None))
+        if novel:
+            fresh = dict(zip(novel, _translate_batch(novel, model, tokenizer, settings)))
+            for sentence in novel:
+                memory.add(sentence, memory_lang, preset_name, fresh[sentence])
+            results = [r if r is not None else fresh[s] for s, r in zip(sentences, results)]
+        return " ".join(results)
+
+    chunks = _chunk_text(text, max_words=350)
+    translated_chunks = []
+    for chunk in chunks:
+        inputs = tokenizer.encode(chunk, return_tensors="pt", truncation=True, max_length=TRANSLATION_MAX_LENGTH)
+        translated_tokens = model.generate(
+            inputs,
+            max_length=TRANSLATION_MAX_LENGTH,
+            num_beams=settings["translation_beams"],
+            early_stopping=settings["translation_beams"] > 1,
+        )
+        translated_chunks.append(tokenizer.decode(translated_tokens[0], skip_special_tokens=True))
+    return " ".join(translated_chunks)
+
+
+def translate_text(text, target_lang, models, tokenizers, preset=None, memory=None):
     """
-    Translates text to a specified target language using pre-loaded MarianMT models.
+    Translates English text to a specified target language using pre-loaded MarianMT models.
     Long texts are split into chunks to stay within the model's token limit.
+    `preset` selects the beam width (see GENERATION_PRESETS).
+    With a translation `memory` (tm_utils.TranslationMemory) the text is
+    translated sentence by sentence: sentences seen before are reused and only
+    the new ones are sent to the model, in batches.
+    Use translate_any() when the source language is not known to be English.
     """
     if target_lang == "en":
         return text
@@ -43,38 +138,97 @@ def translate_text(text, target_lang, models, tokenizers):
         st.warning(f"Translation to {target_lang.upper()} is not supported. Returning original text.")
         return text
 
-    model = models[target_lang]
-    tokenizer = tokenizers[target_lang]
-
     try:
-        chunks = _chunk_text(text, max_words=350)
-        translated_chunks = []
-        for chunk in chunks:
-            inputs = tokenizer.encode(chunk, return_tensors="pt", truncation=True, max_length=512)
-            translated_tokens = model.generate(inputs, max_length=512, num_beams=4, early_stopping=True)
-            translated_chunks.append(tokenizer.decode(translated_tokens[0], skip_special_tokens=True))
-        return " ".join(translated_chunks)
+        return _marian_translate(
+            text, models[target_lang], tokenizers[target_lang], get_preset(preset),
+            memory=memory, memory_lang=target_lang, preset=preset,
+        )
     except Exception as e:
         st.error(f"❌ Error during translation to {target_lang.upper()}: {e}. Returning original text.")
         return text
 
 
+@st.cache_resource
+def load_translation_pair(source_lang, target_lang):
+    """
+    Loads the Helsinki-NLP MarianMT model for one language pair on first use
+    (e.g. fr → en). Returns (model, tokenizer), or None if no such model exists.
+    """
+    try:
+        return _load_marian(f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}")
+    except OSError:
+        return None
+
+
+def _translate_to_english(text, source_lang, preset=None, memory=None):
+    pair = load_translation_pair(source_lang, "en")
+    if pair is None:
+        st.warning(f"Translation from {source_lang.upper()} is not supported. Keeping the original text.")
+        return text
+    try:
+        return _marian_translate(
+            text, pair[0], pair[1], get_preset(preset),
+            memory=memory, memory_lang=f"{source_lang}>en", preset=preset,
+        )
+    except Exception as e:
+        st.error(f"❌ Error during translation from {source_lang.upper()}: {e}. Keeping the original text.")
+        return text
+
+
+def translate_any(text, target_lang, models, tokenizers, preset=None, memory=None):
+    """
+    Translates text in any (or mixed) source language to `target_lang`.
+    The text is split into runs of one language (langid_utils); runs already
+    in the target language are kept as they are, other runs go through their
+    X → en model (loaded lazily) and then, for non-English targets, through
+    the pre-loaded en → X model.
+    Text that is entirely in the target language is returned unchanged.
+    """
+    runs = split_by_language(text)
+    if all(lang == target_lang for lang, _, _ in runs):
+        return text
+
+    pieces = []
+    for lang, start, end in runs:
+        segment = text[start:end]
+        if lang == target_lang:
+            pieces.append(segment)
+            continue
+        english = segment if lang == "en" else _translate_to_english(segment, lang, preset, memory)
+        if target_lang != "en":
+            english = translate_text(english, target_lang, models, tokenizers, preset=preset, memory=memory)
+        pieces.append(english)
+    return "\n\n".join(pieces)
+
+
 # --- Summarization Functions ---
 @st.cache_resource
-def load_summarizer():
+def _load_pipeline(model_name):
+    """One summarization pipeline per model, however many presets use it."""
+    if SHARED_MODELS:
+        model, tokenizer = load_shared_model(model_name)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+    return pipeline("summarization", model=model_name)
+
+
+def load_summarizer(preset=None):
     """
-    Loads a summarization pipeline using BART.
-    The pipeline is cached for performance.
+    Returns the summarization pipeline for the given preset (BART-large-CNN
+    by default, DistilBART for "fast"). Presets only choose the model and the
+    decoding settings; "balanced" and "best" share one cached pipeline.
     """
-    return pipeline("summarization", model="facebook/bart-large-cnn")
+    return _load_pipeline(get_preset(preset)["summarizer_model"])
 
 
-def summarize_text(text, summarizer_pipeline, max_length=150, min_length=50):
+def summarize_text(text, summarizer_pipeline, max_length=150, min_length=50, preset=None):
     """
     Summarizes the given text using the loaded summarization pipeline.
     Long texts are split into chunks; each chunk is summarized and the
     partial summaries are joined for a final pass.
+    `preset` selects the decoding strategy; pass a pipeline loaded with
+    load_summarizer(preset) to also get the matching model.
     """
+    num_beams = get_preset(preset)["summary_beams"]
     words = text.split()
     if len(words) < 50:
         st.info("Text is too short for effective summarization. Returning original text.")
@@ -89,6 +243,7 @@ def summarize_text(text, summarizer_pipeline, max_length=150, min_length=50):
                 chunk,
                 max_length=max_length,
                 min_length=min(min_length, max(10, len(chunk.split()) // 2)),
+                num_beams=num_beams,
                 do_sample=False,
             )
             partial_summaries.append(result[0]["summary_text"])
@@ -101,6 +256,7 @@ def summarize_text(text, summarizer_pipeline, max_length=150, min_length=50):
                     combined,
                     max_length=max_length,
                     min_length=min_length,
+                    num_beams=num_beams,
                     do_sample=False,
                 )
                 return final[0]["summary_text"]
@@ -108,3 +264,64 @@ def summarize_text(text, summarizer_pipeline, max_length=150, min_length=50):
     except Exception as e:
         st.error(f"❌ Error during summarization: {e}. Returning original text.")
         return text
+
+
+# --- Extractive Summarization ---
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the a an and or but if of to in on at by for with from as is are was were be been "
+    "being it its this that these those he she they we you i his her their our your not "
+    "no so than then there here have has had do does did will would can could should may "
+    "might must also into about over after before such which who whom what when where why how".split()
+)
+
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation followed by a capitalised start."""
+    return [s.strip() for s in _SENTENCE_SPLIT.split(" ".join(text.split())) if s.strip()]
+
+
+def extractive_summary(text, num_sentences=5):
+    """
+    Instant summary built from the document's own sentences.
+    Each sentence is scored by the cosine similarity of its TF-IDF vector to
+    the document centroid; the top sentences are returned in reading order.
+    All scoring is done with NumPy over (sentence, term) pairs, so it runs in
+    well under a second even for book-length input.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= num_sentences:
+        return " ".join(sentences)
+
+    vocab = {}
+    sent_ids, term_ids = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if len(word) > 2 and word not in _STOPWORDS:
+                sent_ids.append(i)
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+    if not vocab:
+        return " ".join(sentences[:num_sentences])
+
+    n_sent, n_terms = len(sentences), len(vocab)
+    # Collapse repeated (sentence, term) pairs into term frequencies
+    pair_keys, tf = np.unique(np.asarray(sent_ids, dtype=np.int64) * n_terms + np.asarray(term_ids), return_counts=True)
+    rows, cols = pair_keys // n_terms, pair_keys % n_terms
+
+    df = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + n_sent) / (1 + df)) + 1.0
+    weights = (1 + np.log(tf)) * idf[cols]
+
+    centroid = np.bincount(cols, weights=weights, minlength=n_terms)
+    centroid_norm = np.linalg.norm(centroid) or 1.0
+    sentence_norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_sent))
+    dots = np.bincount(rows, weights=weights * centroid[cols], minlength=n_sent)
+    scores = dots / (np.where(sentence_norms > 0, sentence_norms, 1.0) * centroid_norm)
+
+    # Prefer sentences with enough content to stand alone when spoken
+    lengths = np.fromiter((len(s.split()) for s in sentences), dtype=np.int64, count=n_sent)
+    scores[lengths < 6] *= 0.5
+
+    top = np.sort(np.argpartition(-scores, num_sentences - 1)[:num_sentences])
+    return " ".join(sentences[i] for i in top)
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Per-document profiling for TapVision.
+
+When a document is slow, this shows where the time went: HTML parsing,
+Tesseract, tokenization, beam search or gTTS network calls.
+
+A profile covers one document's full run and writes three files to
+~/TapVision/profiles/:
+
+- <name>.txt     — report: time per pipeline stage, hottest functions,
+                   cProfile and torch operator tables when available
+- <name>.folded  — collapsed stacks for flamegraph.pl, speedscope or
+                   inferno ("frame;frame;frame count" per line)
+- <name>.prof    — raw cProfile stats (pstats / snakeviz), single-thread runs only
+
+A sampling profiler walks every thread's stack (so the watcher's background
+summary and TTS threads are covered), and torch.profiler records the
+operators run by generate(). Frames from TapVision's own modules are labelled
+with the pipeline stage they belong to, e.g.
+"nlp_utils.summarize_text [summarize]".
+
+Enable with TAPVISION_PROFILE=1 for watcher.py and app.py, or profile a
+single file from the command line:
+
+    python profile_utils.py report.pdf --preset fast --lang fr
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_ENABLED = os.environ.get("TAPVISION_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get(
+    "TAPVISION_PROFILE_DIR",
+    os.path.expanduser("~/TapVision/profiles"),
+)
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+
+# Stage labels, most specific first: (module or module.function prefix, stage)
+STAGE_RULES = (
+    ("text_utils.read_image",           "extract:ocr"),
+    ("text_utils.read_web_page",        "extract:web"),
+    ("text_utils._fetch_page_soup",     "extract:web"),
+    ("text_utils",                      "extract"),
+    ("pytesseract",                     "extract:ocr"),
+    ("bs4",                             "extract:html"),
+    ("fitz",                            "extract:pdf"),
+    ("pymupdf",                         "extract:pdf"),
+    ("docx",                            "extract:docx"),
+    ("ebooklib",                        "extract:epub"),
+    ("nlp_utils.extractive_summary",    "preview"),
+    ("nlp_utils.summarize_text",        "summarize"),
+    ("nlp_utils.translate_text",        "translate"),
+    ("nlp_utils.load_",                 "load_models"),
+    ("nlp_utils",                       "nlp"),
+    ("tm_utils",                        "translate:memory"),
+    ("langid_utils",                    "langid"),
+    ("transformers.tokenization",       "tokenize"),
+    ("tokenizers",                      "tokenize"),
+    ("transformers.generation",         "generate"),
+    ("torch",                           "generate"),
+    ("speech_utils.synthesize_speech",  "speech:tts"),
+    ("speech_utils",                    "speech"),
+    ("reading_utils",                   "speech:reading"),
+    ("gtts",                            "speech:gtts"),
+    ("pyttsx3",                         "speech:offline"),
+    ("store_utils",                     "store"),
+    ("search_utils",                    "index"),
+)
+_OWN_MODULES = {"text_utils", "nlp_utils", "speech_utils", "store_utils", "search_utils",
+                "tm_utils", "langid_utils", "reading_utils", "watcher", "app", "profile_utils"}
+
+# Threads blocked in these frames are waiting, not working
+_IDLE_LEAVES = {
+    ("threading", "wait"), ("threading", "_wait_for_tstate_lock"), ("threading", "join"),
+    ("queue", "get"), ("selectors", "select"),
+}
+# Long-running service threads that never belong to a document
+_IGNORED_MODULES = ("watchdog", "speech_recognition", "pyaudio")
+
+_active_lock = threading.Lock()
+_active_done = threading.Condition(_active_lock)
+_active = None   # profiles overlap badly when sampling all threads: one at a time
+
+
+# --- Stack sampling ---
+class _StackSampler:
+    """Samples the Python stack of every thread at a fixed interval."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, ignore_threads=()):
+        self.interval       = interval
+        self.ignore_threads = set(ignore_threads)
+        self.stacks         = Counter()   # tuple of frame names → samples
+        self.samples        = 0
+        self._names         = {}          # code object → frame name
+        self._stop          = threading.Event()
+        self._thread        = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="tapvision-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _frame_name(self, frame):
+        code = frame.f_code
+        name = self._names.get(code)
+        if name is None:
+            module = frame.f_globals.get("__name__", "?")
+            qualified = f"{module}.{code.co_name}"
+            stage = stage_of(qualified)
+            name = f"{qualified} [{stage}]" if stage and module in _OWN_MODULES else qualified
+            self._names[code] = name
+        return name
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                thread_name = names.get(ident, str(ident))
+                if ident == own or thread_name in self.ignore_threads:
+                    continue
+                leaf_module = frame.f_globals.get("__name__", "")
+                if (leaf_module, frame.f_code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame)
+                    frame = frame.f_back
+                modules = [f.f_globals.get("__name__", "") for f in stack]
+                if any(m.startswith(_IGNORED_MODULES) for m in modules):
+                    continue
+                # Strip the thread-number prefix so runs aggregate across threads
+                thread_label = re.sub(r"^Thread-\d+ \((.*)\)$", r"\1", thread_name)
+                self.stacks[(thread_label,) + tuple(self._frame_name(f) for f in reversed(stack))] += 1
+
+
+def stage_of(qualified_name):
+    """Pipeline stage for a "module.function" name, or None."""
+    for prefix, stage in STAGE_RULES:
+        if not qualified_name.startswith(prefix):
+            continue
+        # Match whole names only ("torch" but not "torchvision"); "load_" is a name prefix
+        rest = qualified_name[len(prefix):]
+        if not rest or rest[0] in "._" or prefix.endswith("_"):
+            return stage
+    return None
+
+
+# --- torch.profiler (optional) ---
+def _start_torch_profiler():
+    try:
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        return None
+    try:
+        prof = profile(activities=[ProfilerActivity.CPU], record_shapes=False)
+        prof.start()
+        return prof
+    except Exception as e:
+        print(f"[TapVision] torch profiler unavailable: {e}")
+        return None
+
+
+# --- Document profile ---
+class DocumentProfiler:
+    """
+    Profiles one document run. Use as a context manager when the run happens
+    on one thread (app.py, CLI), or call start() and stop() from different
+    threads (watcher.py). Only one profile is recorded at a time, because
+    every thread is sampled; a profiler started while another is active
+    records nothing, sets `skipped` and says so on the console, unless it is
+    started with `wait=True`, which blocks until the other profile ends.
+    `deterministic=True` also runs cProfile on the calling thread.
+    The torch profiler must be stopped on the thread that started it; pass
+    `torch_ops=False` when start() and stop() run on different threads.
+    """
+
+    def __init__(self, label, deterministic=False, ignore_threads=(), torch_ops=True):
+        self.label          = label
+        self.deterministic  = deterministic
+        self.ignore_threads = ignore_threads
+        self.torch_ops      = torch_ops
+        self.report_path    = None
+        self.recording      = False
+        self.skipped        = False
+        self._sampler       = None
+        self._cprofile      = None
+        self._torch         = None
+        self._started       = None
+
+    def start(self, wait=False):
+        global _active
+        with _active_lock:
+            while wait and _active is not None:
+                _active_done.wait()
+            if _active is not None:
+                self.skipped = True
+                print(f"[TapVision] Not profiling {self.label}: {_active.label} is still being profiled.")
+                return self
+            _active = self
+        self.recording = True
+        self._started = time.perf_counter()
+        self._sampler = _StackSampler(ignore_threads=self.ignore_threads).start()
+        self._torch = _start_torch_profiler() if self.torch_ops else None
+        if self.deterministic:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def stop(self):
+        """Stop recording and write the report; returns its path (None if nothing was recorded)."""
+        global _active
+        if not self.recording:
+            return None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        wall = time.perf_counter() - self._started
+        self._sampler.stop()
+        if self._torch is not None:
+            try:
+                self._torch.stop()
+            except Exception as e:
+                print(f"[TapVision] torch profiler failed: {e}")
+                self._torch = None
+        self.recording = False
+        with _active_lock:
+            _active = None
+            _active_done.notify_all()
+
+        try:
+            self.report_path = self._write(wall)
+        except OSError as e:
+            print(f"[TapVision] Could not write profile: {e}")
+            return None
+        print(f"[TapVision] Profile written to {self.report_path}")
+        return self.report_path
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ── output ────────────────────────────────────────────────────────────────
+
+    def _write(self, wall):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", self.label)[:60] or "document"
+        base = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}")
+        stacks, interval = self._sampler.stacks, self._sampler.interval
+
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(";".join(name.replace(";", ":") for name in stack) + f" {count}\n")
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(base + ".prof")
+
+        out = io.StringIO()
+        out.write(f"TapVision profile: {self.label}\n")
+        out.write(f"Wall time: {wall:.2f}s   samples: {self._sampler.samples} "
+                  f"every {interval * 1000:.0f} ms (idle threads excluded)\n")
+        out.write(f"Flamegraph stacks: {base}.folded\n\n")
+
+        # Busy time per stage: each sample counts once, for its innermost labelled frame
+        stage_samples = Counter()
+        self_samples = Counter()
+        for stack, count in stacks.items():
+            stage = "other"
+            for name in reversed(stack[1:]):
+                label = stage_of(name.split(" [", 1)[0])
+                if label:
+                    stage = label
+                    break
+            stage_samples[stage] += count
+            self_samples[stack[-1]] += count
+        total = sum(stage_samples.values()) or 1
+
+        out.write("Busy time by stage (summed over threads)\n")
+        for stage, count in stage_samples.most_common():
+            out.write(f"  {stage:<20} {count * interval:8.2f}s  {100 * count / total:5.1f}%\n")
+
+        out.write("\nHottest functions (self time)\n")
+        for name, count in self_samples.most_common(25):
+            out.write(f"  {count * interval:8.2f}s  {name}\n")
+
+        if self._cprofile is not None:
+            out.write("\ncProfile (calling thread, by cumulative time)\n")
+            stats = pstats.Stats(self._cprofile, stream=out)
+            stats.sort_stats("cumulative").print_stats(30)
+
+        if self._torch is not None:
+            out.write("\ntorch operators (generate)\n")
+            try:
+                out.write(self._torch.key_averages().table(sort_by="self_cpu_time_total", row_limit=20))
+                self._torch.export_chrome_trace(base + ".torch.json")
+                out.write(f"\nChrome trace: {base}.torch.json\n")
+            except Exception as e:
+                out.write(f"  unavailable: {e}\n")
+
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return base + ".txt"
+
+
+@contextmanager
+def profile_document(label, enabled=None, deterministic=True):
+    """
+    Profile the enclosed block as one document run when profiling is enabled
+    (TAPVISION_PROFILE=1 or enabled=True). Yields the DocumentProfiler, or None.
+    """
+    if not (PROFILE_ENABLED if enabled is None else enabled):
+        yield None
+        return
+    profiler = DocumentProfiler(label, deterministic=deterministic)
+    with profiler:
+        yield profiler
+
+
+# --- Command line ---
+def profile_file(path, preset=None, lang=None, speech=True):
+    """Run the full pipeline for one file under the profiler and return the report path."""
+    from resource_utils import apply_resource_budget
+    apply_resource_budget()
+
+    from text_utils import read_text_with_offsets
+    from nlp_utils import (
+        extractive_summary, load_summarizer, load_translation_models, summarize_text, translate_text,
+    )
+    from speech_utils import synthesize_speech
+
+    # Model loading is a one-off cost; keep it out of the document profile
+    summarizer = load_summarizer(preset)
+    models, tokenizers = load_translation_models() if lang and lang != "en" else ({}, {})
+
+    with DocumentProfiler(os.path.basename(path), deterministic=True) as profiler:
+        text, _ = read_text_with_offsets(path=path)
+        extractive_summary(text)
+        summary = summarize_text(text, summarizer, preset=preset)
+        if lang and lang != "en":
+            summary = translate_text(summary, lang, models, tokenizers, preset=preset)
+        if speech:
+            audio = synthesize_speech(summary, lang or "en")
+            if audio and os.path.exists(audio):
+                os.remove(audio)
+    return profiler.report_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile TapVision on one document.")
+    parser.add_argument("path")
+    parser.add_argument("--preset", default=None, help="fast, balanced or best")
+    parser.add_argument("--lang", default=None, help="translate the summary, e.g. fr")
+    parser.add_argument("--no-speech", action="store_true", help="skip text-to-speech")
+    args = parser.parse_args()
+
+    report = profile_file(args.path, preset=args.preset, lang=args.lang, speech=not args.no_speech)
+    if report:
+        with open(report, encoding="utf-8") as f:
+            print(f.read())
@@ -0,0 +1,233 @@
+"""
+Durable job queue for the hands-free watcher.
+
+Every file that arrives in the inbox becomes a row in a small SQLite
+database before any work starts, so nothing is lost if the watcher crashes
+or is killed: on the next start, jobs that were in flight go back to
+"pending" and are picked up again.
+
+Job states:  pending → running → ready → done
+                          ↘ pending (retry with backoff) ↘ failed
+
+Jobs are handed out by priority — plain text first, then documents, then
+PDFs and finally images that need OCR — and by size within a priority, so a
+burst of small files is not stuck behind one large scan.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+QUEUE_PATH = os.environ.get(
+    "TAPVISION_QUEUE",
+    os.path.expanduser("~/TapVision/jobs.db"),
+)
+
+MAX_ATTEMPTS    = 3
+BACKOFF_SECONDS = 5.0     # first retry delay; doubles on each attempt
+KEEP_DONE_DAYS  = 7
+
+# Lower runs first
+TYPE_PRIORITY = {
+    "txt":  0,
+    "docx": 1,
+    "epub": 1,
+    "pdf":  2,
+    "jpg":  3,
+    "jpeg": 3,
+    "png":  3,
+}
+
+ACTIVE_STATES = ("pending", "running", "ready")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    path             TEXT NOT NULL,
+    priority         INTEGER NOT NULL,
+    size             INTEGER NOT NULL,
+    state            TEXT NOT NULL DEFAULT 'pending',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at  REAL NOT NULL DEFAULT 0,
+    last_error       TEXT,
+    created_at       REAL NOT NULL,
+    updated_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_runnable ON jobs(state, priority, size, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs(path);
+"""
+
+
+def job_priority(path):
+    ext = path.rsplit(".", 1)[-1].lower() if "." in os.path.basename(path) else ""
+    return TYPE_PRIORITY.get(ext, 0)   # unsupported files are rejected instantly, so go first
+
+
+class Job:
+    __slots__ = ("id", "path", "attempts")
+
+    def __init__(self, job_id, path, attempts):
+        self.id       = job_id
+        self.path     = path
+        self.attempts = attempts
+
+
+class JobQueue:
+    """Thread-safe, persistent priority queue of inbox files."""
+
+    def __init__(self, path=QUEUE_PATH, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS):
+        self.max_attempts = max_attempts
+        self.backoff      = backoff
+        self._cond        = threading.Condition()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._cond:
+            self._conn.close()
+
+    # ── producer side ─────────────────────────────────────────────────────────
+
+    def enqueue(self, path):
+        """
+        Add a file to the queue. Returns the job id, or None if the same path
+        already has an active job (e.g. rediscovered by the startup scan).
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        now = time.time()
+        with self._cond:
+            exists = self._conn.execute(
+                f"SELECT 1 FROM jobs WHERE path = ? AND state IN ({','.join('?' * len(ACTIVE_STATES))})",
+                (path, *ACTIVE_STATES),
+            ).fetchone()
+            if exists:
+                return None
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (path, priority, size, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (path, job_priority(path), size, now, now),
+            ).lastrowid
+            self._conn.commit()
+            self._cond.notify_all()
+        return job_id
+
+    # ── consumer side ─────────────────────────────────────────────────────────
+
+    def claim(self, timeout=None):
+        """
+        Take the highest-priority runnable job and mark it running.
+        Blocks until one is available (or `timeout` seconds pass → None).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT id, path, attempts FROM jobs "
+                    "WHERE state = 'pending' AND next_attempt_at <= ? "
+                    "ORDER BY priority, size, id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (now, row[0]),
+                    )
+                    self._conn.commit()
+                    return Job(row[0], row[1], row[2] + 1)
+
+                # Sleep until the next retry becomes due, a new job arrives, or timeout
+                next_retry = self._conn.execute(
+                    "SELECT MIN(next_attempt_at) FROM jobs WHERE state = 'pending'"
+                ).fetchone()[0]
+                waits = []
+                if next_retry is not None:
+                    waits.append(max(0.0, next_retry - now))
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    waits.append(remaining)
+                self._cond.wait(min(waits) if waits else None)
+
+    def _set_state(self, job_id, state, error=None):
+        with self._cond:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, last_error = COALESCE(?, last_error), updated_at = ? WHERE id = ?",
+                (state, error, time.time(), job_id),
+            )
+            self._conn.commit()
+            self._cond.notify_all()
+
+    def mark_ready(self, job_id):
+        """Extraction finished; the result is waiting to be spoken."""
+        self._set_state(job_id, "ready")
+
+    def complete(self, job_id):
+        self._set_state(job_id, "done")
+
+    def fail(self, job, error, retryable=True):
+        """
+        Record a failed attempt. Retryable jobs go back to pending with
+        exponential backoff until max_attempts is reached.
+        Returns True if the job will be retried, False if it is now failed.
+        """
+        if retryable and job.attempts < self.max_attempts:
+            delay = self.backoff * (2 ** (job.attempts - 1))
+            with self._cond:
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'pending', next_attempt_at = ?, last_error = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (time.time() + delay, str(error), time.time(), job.id),
+                )
+                self._conn.commit()
+                self._cond.notify_all()
+            return True
+        self._set_state(job.id, "failed", str(error))
+        return False
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+
+    def recover(self):
+        """
+        Call once at startup: jobs that were running or waiting to be spoken
+        when the previous process died go back to pending; jobs whose file has
+        disappeared are dropped; old finished jobs are purged.
+        Returns the number of jobs resumed.
+        """
+        with self._cond:
+            rows = self._conn.execute(
+                f"SELECT id, path FROM jobs WHERE state IN ({','.join('?' * len(ACTIVE_STATES))})",
+                ACTIVE_STATES,
+            ).fetchall()
+            gone = [(job_id,) for job_id, path in rows if not os.path.exists(path)]
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", gone)
+            resumed = self._conn.execute(
+                "UPDATE jobs SET state = 'pending', next_attempt_at = 0, updated_at = ? "
+                "WHERE state IN ('running', 'ready')",
+                (time.time(),),
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - KEEP_DONE_DAYS * 86400,),
+            )
+            self._conn.commit()
+            self._cond.notify_all()
+        return resumed
+
+    def counts(self):
+        with self._cond:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+
+if __name__ == "__main__":
+    print(JobQueue().counts())
@@ -0,0 +1,271 @@
+"""
+Long-form reading sessions for the hands-free watcher.
+
+A document is split into paragraph-sized segments. A prefetch thread renders
+the next few segments to audio while the current one plays, so long books
+start speaking straight away instead of being synthesized up front. Playback
+runs on its own thread and can be moved with next / back / pause / resume,
+which the listener hears in the short pause left after each segment;
+the current segment is saved in the document store so a later session can
+resume where the listener left off, even after a restart. A document's
+headings are stored too, so the listener can jump straight to a section.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from search_utils import split_spans
+from speech_utils import play_audio, speak_offline, synthesize_speech
+
+PREFETCH_SEGMENTS = 3     # segments synthesized ahead of the one playing
+SEGMENT_WORDS     = 120   # paragraphs longer than this are split at sentences
+LISTEN_GAP        = 1.5   # seconds of silence after each segment, so commands can be heard
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading_positions (
+    doc_hash    TEXT PRIMARY KEY REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    segment     INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reading_contents (
+    doc_hash    TEXT PRIMARY KEY REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    headings    TEXT NOT NULL
+);
+"""
+
+
+# --- Saved positions ---
+class ReadingPositions:
+    """Per-document bookmarks and tables of contents stored alongside a DocumentStore."""
+
+    def __init__(self, store):
+        self.store = store
+        with self.store.transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    def get(self, doc_hash):
+        """Returns the saved segment index for a document (0 if none)."""
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT segment FROM reading_positions WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def save(self, doc_hash, segment, total):
+        if doc_hash not in self.store:
+            return
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reading_positions (doc_hash, segment, total, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (doc_hash, segment, total, time.time()),
+            )
+
+    def clear(self, doc_hash):
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM reading_positions WHERE doc_hash = ?", (doc_hash,))
+
+    def save_headings(self, doc_hash, headings):
+        """Remember a document's headings as (title, level, character offset) tuples."""
+        if doc_hash not in self.store:
+            return
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reading_contents (doc_hash, headings) VALUES (?, ?)",
+                (doc_hash, json.dumps([list(h) for h in headings])),
+            )
+
+    def headings(self, doc_hash):
+        """The saved (title, level, offset) headings of a document, or []."""
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT headings FROM reading_contents WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone()
+        return [tuple(h) for h in json.loads(row[0])] if row else []
+
+
+def document_headings(structure):
+    """(title, level, offset) for each heading of a text_utils.StructuredDocument."""
+    return [(block.text, block.level, block.start) for block in structure.headings()]
+
+
+# --- Session ---
+class ReadingSession:
+    """
+    Plays a document segment by segment on background threads.
+    Control methods (next, back, pause, resume, stop) are safe to call from
+    any thread, e.g. the voice command loop.
+    """
+
+    def __init__(self, doc_hash, text, lang="en", positions=None, prefetch=PREFETCH_SEGMENTS):
+        self.doc_hash  = doc_hash
+        self.text      = text
+        self.lang      = lang
+        self.positions = positions
+        self.prefetch  = prefetch
+        self.segments  = list(split_spans(text, max_words=SEGMENT_WORDS))
+        self._starts   = [start for start, _ in self.segments]
+        self.index     = 0
+
+        self._cond      = threading.Condition()
+        self._audio     = {}                  # segment index → mp3 path (or None if offline)
+        self._interrupt = threading.Event()   # stops the segment currently playing
+        self._paused    = False
+        self._stopped   = False
+        self._threads   = []
+
+    # ── public API ────────────────────────────────────────────────────────────
+
+    @property
+    def saved_position(self):
+        return self.positions.get(self.doc_hash) if self.positions else 0
+
+    def segment_at(self, offset):
+        """Index of the segment containing a character offset (e.g. a heading's)."""
+        return max(0, bisect.bisect_right(self._starts, offset) - 1)
+
+    def start(self, from_saved=False, at=0):
+        """Begin playback from segment `at` (the start by default), or from the saved position."""
+        if not self.segments:
+            return
+        position = self.saved_position if from_saved else at
+        self.index = max(0, min(position, len(self.segments) - 1))
+        for target in (self._prefetch_loop, self._play_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def next(self):
+        self._seek(+1)
+
+    def back(self):
+        self._seek(-1)
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+            self._interrupt.set()
+            self._save()
+            self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        """Stop playback for good, keeping the position for a later resume."""
+        with self._cond:
+            if self.is_active():
+                self._save()   # never overwrite a bookmark from a session that did not play
+            self._stopped = True
+            self._interrupt.set()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._discard_audio(keep=())
+
+    def is_active(self):
+        """True while there is still something to play (playing or paused)."""
+        return any(t.is_alive() for t in self._threads) and not self._stopped
+
+    def is_playing(self):
+        return self.is_active() and not self._paused
+
+    @property
+    def progress(self):
+        return min(self.index + 1, len(self.segments)), len(self.segments)
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _seek(self, step):
+        with self._cond:
+            self.index = max(0, min(len(self.segments) - 1, self.index + step))
+            self._paused = False
+            self._interrupt.set()
+            self._save()
+            self._cond.notify_all()
+
+    def _save(self):
+        if self.positions:
+            self.positions.save(self.doc_hash, self.index, len(self.segments))
+
+    def _segment_text(self, i):
+        start, end = self.segments[i]
+        return self.text[start:end]
+
+    def _wanted(self):
+        return range(self.index, min(len(self.segments), self.index + self.prefetch + 1))
+
+    def _discard_audio(self, keep):
+        with self._cond:
+            stale = [i for i in self._audio if i not in keep]
+            paths = [self._audio.pop(i) for i in stale]
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                missing = [i for i in self._wanted() if i not in self._audio]
+                if not missing:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                i = missing[0]
+            path = synthesize_speech(self._segment_text(i), self.lang)
+            with self._cond:
+                if self._stopped:
+                    # stop() already discarded the audio; this file finished too late
+                    if path and os.path.exists(path):
+                        os.remove(path)
+                    return
+                self._audio[i] = path
+                self._cond.notify_all()
+            keep = set(self._wanted())
+            self._discard_audio(keep)
+
+    def _play_loop(self):
+        while True:
+            with self._cond:
+                while self._paused and not self._stopped:
+                    self._cond.wait()
+                if self._stopped or self.index >= len(self.segments):
+                    break
+                i = self.index
+                self._save()
+                while i not in self._audio and not self._stopped and self.index == i:
+                    self._cond.wait(timeout=0.5)
+                if self._stopped or self.index != i or self._paused:
+                    continue
+                path = self._audio[i]
+                self._interrupt.clear()
+
+            if path:
+                finished = play_audio(path, interrupt=self._interrupt)
+            else:
+                speak_offline(self._segment_text(i))  # offline: not interruptible mid-segment
+                finished = not self._interrupt.is_set()
+
+            with self._cond:
+                if finished and self.index == i:
+                    self.index += 1
+                    self._cond.notify_all()
+                    # Pause before the next segment: the listener ignores phrases that
+                    # start while TapVision is talking, so this is when commands get in
+                    gap_ends = time.monotonic() + LISTEN_GAP
+                    while self.index == i + 1 < len(self.segments) and not (self._stopped or self._paused) \
+                            and time.monotonic() < gap_ends:
+                        self._cond.wait(gap_ends - time.monotonic())
+
+        with self._cond:
+            if self.index >= len(self.segments) and self.positions:
+                self.positions.clear(self.doc_hash)   # finished — next time start over
+            self._stopped = True
+            self._cond.notify_all()
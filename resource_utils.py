@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+CPU budgeting for TapVision.
+
+torch inference, Tesseract OCR subprocesses and file extraction all compete
+for the same cores. This module decides how many threads each of them gets
+so that app.py and watcher.py do not oversubscribe the machine.
+
+Budgets are derived from the cores available to this process and can be
+overridden in ~/TapVision/resources.json or with environment variables
+(TAPVISION_TORCH_THREADS=4, TAPVISION_CPU_AFFINITY=0-3, ...).
+
+Run `python resource_utils.py --benchmark` to sweep torch thread counts on
+this host and save the fastest setting to the config file.
+
+The budget is applied once per process. torch's thread counts are set through
+its API and take effect whenever that happens, but OMP_NUM_THREADS only caps
+libraries (numpy's BLAS, torch's OpenMP pool) that have not been imported yet;
+under `streamlit run` the server has already imported them, so set it in the
+environment that launches Streamlit if those pools must be capped as well.
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+CONFIG_PATH = os.environ.get(
+    "TAPVISION_RESOURCE_CONFIG",
+    os.path.expanduser("~/TapVision/resources.json"),
+)
+
+DEFAULT_CONFIG = {
+    "reserved_cores":        1,     # left free for Streamlit, watchdog and audio playback
+    "torch_threads":         None,  # None → derived from available cores
+    "torch_interop_threads": 1,     # generate() is sequential; extra inter-op threads only contend
+    "ocr_workers":           None,  # concurrent Tesseract subprocesses
+    "ocr_threads":           1,     # OpenMP threads inside each Tesseract process
+    "extraction_workers":    None,  # concurrent read_text() calls in app.py
+    "cpu_affinity":          None,  # e.g. "0-3" or "0,2,4"; None leaves scheduling to the OS
+}
+
+_apply_lock = threading.Lock()
+_applied_budget = None
+_ocr_semaphore = None
+_extraction_semaphore = None
+
+
+# --- Configuration ---
+def available_cores():
+    """Number of cores this process may run on (respects taskset / cgroups affinity)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _parse_cpu_list(spec):
+    """Parse "0-3,6" into [0, 1, 2, 3, 6]."""
+    cores = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def load_config(path=CONFIG_PATH):
+    """
+    Merge defaults, the JSON config file (if present) and TAPVISION_* environment
+    variables, in that order of precedence.
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                config.update({k: v for k, v in json.load(f).items() if k in DEFAULT_CONFIG})
+        except (OSError, ValueError) as e:
+            print(f"[TapVision] Ignoring unreadable resource config {path}: {e}")
+
+    for key in DEFAULT_CONFIG:
+        value = os.environ.get(f"TAPVISION_{key.upper()}")
+        if value is None or value == "":
+            continue
+        if key == "cpu_affinity":
+            config[key] = value
+            continue
+        try:
+            config[key] = int(value)
+        except ValueError:
+            print(f"[TapVision] Ignoring TAPVISION_{key.upper()}={value!r}: not a whole number")
+    return config
+
+
+def compute_budget(config=None, cores=None):
+    """
+    Split the available cores between torch, OCR and extraction.
+    Explicit values in the config always win over the derived ones.
+    """
+    config = config or load_config()
+    if config.get("cpu_affinity"):
+        cores = len(_parse_cpu_list(config["cpu_affinity"]))
+    cores = cores or available_cores()
+    usable = max(1, cores - int(config.get("reserved_cores") or 0))
+
+    ocr_threads = max(1, int(config.get("ocr_threads") or 1))
+    ocr_workers = config.get("ocr_workers") or max(1, usable // (4 * ocr_threads))
+    torch_threads = config.get("torch_threads") or max(1, usable - ocr_workers * ocr_threads)
+    extraction_workers = config.get("extraction_workers") or max(1, min(4, usable // 2))
+
+    return {
+        "cores":                 cores,
+        "torch_threads":         int(torch_threads),
+        "torch_interop_threads": max(1, int(config.get("torch_interop_threads") or 1)),
+        "ocr_workers":           int(ocr_workers),
+        "ocr_threads":           ocr_threads,
+        "extraction_workers":    int(extraction_workers),
+        "cpu_affinity":          config.get("cpu_affinity"),
+    }
+
+
+# --- Applying the budget ---
+def _set_torch_threads(num_threads, interop_threads=None):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass  # Can only be set once, before any inter-op work has started
+
+
+def apply_resource_budget(config=None):
+    """
+    Apply the thread budget to this process. Safe to call more than once —
+    only the first call (per process) takes effect, so Streamlit reruns are free.
+    Returns the budget that is in force.
+    """
+    global _applied_budget, _ocr_semaphore, _extraction_semaphore
+    with _apply_lock:
+        if _applied_budget is not None:
+            return _applied_budget
+
+        budget = compute_budget(config)
+
+        if budget["cpu_affinity"] and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, _parse_cpu_list(budget["cpu_affinity"]))
+            except OSError as e:
+                print(f"[TapVision] Could not set CPU affinity: {e}")
+
+        # Tesseract and the BLAS libraries read these when they start
+        os.environ["OMP_THREAD_LIMIT"] = str(budget["ocr_threads"])
+        os.environ.setdefault("OMP_NUM_THREADS", str(budget["torch_threads"]))
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+        _set_torch_threads(budget["torch_threads"], budget["torch_interop_threads"])
+
+        _ocr_semaphore = threading.BoundedSemaphore(budget["ocr_workers"])
+        _extraction_semaphore = threading.BoundedSemaphore(budget["extraction_workers"])
+        _applied_budget = budget
+
+        print(
+            f"[TapVision] CPU budget: {budget['cores']} cores → "
+            f"torch {budget['torch_threads']}/{budget['torch_interop_threads']} threads, "
+            f"OCR {budget['ocr_workers']} worker(s), "
+            f"extraction {budget['extraction_workers']} worker(s)"
+        )
+        return budget
+
+
+@contextmanager
+def _slot(semaphore):
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
+
+
+def ocr_slot():
+    """Limit the number of Tesseract subprocesses running at once."""
+    return _slot(_ocr_semaphore)
+
+
+def extraction_slot():
+    """Limit the number of concurrent read_text() calls (one per Streamlit session)."""
+    return _slot(_extraction_semaphore)
+
+
+# --- Benchmark mode ---
+_BENCHMARK_TEXT = (
+    "TapVision extracts text from documents and images, summarizes it with a "
+    "neural model, translates it into the user's language, and reads the result "
+    "aloud. The summarization step dominates processing time on a CPU-only host, "
+    "so the number of intra-op threads given to torch has a large effect on how "
+    "long a blind user waits before hearing anything useful. "
+) * 12
+
+
+def benchmark_thread_counts(thread_counts=None, repeats=3, save=True):
+    """
+    Time one summarization pass for each torch thread count and return
+    {threads: median_seconds}. The fastest setting is written to CONFIG_PATH.
+    """
+    import torch
+    from nlp_utils import load_summarizer, summarize_text
+
+    cores = available_cores()
+    if not thread_counts:
+        thread_counts = sorted({1, 2, 4, 8, 16, cores // 2, cores} - {0})
+        thread_counts = [n for n in thread_counts if n <= cores]
+
+    summarizer = load_summarizer()
+    summarize_text(_BENCHMARK_TEXT, summarizer)  # warm-up
+
+    results = {}
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            summarize_text(_BENCHMARK_TEXT, summarizer)
+            timings.append(time.perf_counter() - start)
+        results[threads] = statistics.median(timings)
+        print(f"  torch_threads={threads:<3} median {results[threads]:.2f}s")
+
+    best = min(results, key=results.get)
+    print(f"Fastest: torch_threads={best} ({results[best]:.2f}s)")
+
+    if save:
+        config = {}
+        if os.path.exists(CONFIG_PATH):
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        config["torch_threads"] = best
+        os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
+        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        print(f"Saved to {CONFIG_PATH}")
+    return results
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        print(f"Benchmarking torch thread counts on {available_cores()} cores…")
+        benchmark_thread_counts()
+    else:
+        print(json.dumps(compute_budget(), indent=2))
@@ -0,0 +1,237 @@
+"""
+Full-text search over processed documents.
+
+Documents are split into paragraph-sized spans and indexed with an inverted
+index (term → span postings) that lives in the document store's SQLite
+database, so it persists across runs and spans are dropped automatically
+when the store evicts their document. Queries are ranked with BM25, with a
+boost for spans that contain the query as an exact phrase.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.2
+BM25_B  = 0.75
+
+PHRASE_BOOST     = 1.5   # score multiplier for spans containing the exact phrase
+MAX_SPAN_WORDS   = 120   # longer paragraphs are split at sentence boundaries
+STATS_TTL        = 60.0  # seconds before corpus statistics are recomputed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_spans (
+    span_id   INTEGER PRIMARY KEY,
+    doc_hash  TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    start     INTEGER NOT NULL,
+    end       INTEGER NOT NULL,
+    length    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_spans_doc ON search_spans(doc_hash);
+
+CREATE TABLE IF NOT EXISTS search_postings (
+    term     TEXT NOT NULL,
+    span_id  INTEGER NOT NULL REFERENCES search_spans(span_id) ON DELETE CASCADE,
+    tf       INTEGER NOT NULL,
+    PRIMARY KEY (term, span_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_postings_span ON search_postings(span_id);
+"""
+
+_TOKEN      = re.compile(r"\w+", re.UNICODE)
+_PARAGRAPH  = re.compile(r"\S(?:.*?\S)?(?=\n\s*\n|\Z)", re.DOTALL)
+_SENTENCE   = re.compile(r"\S.*?(?:[.!?](?=\s)|\Z)", re.DOTALL)
+
+
+# --- Tokenization ---
+def _stem(token):
+    """Very light plural stripping so "refunds" matches "refund"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [_stem(t) for t in _TOKEN.findall(text.lower())]
+
+
+def split_spans(text, base_offset=0, max_words=MAX_SPAN_WORDS):
+    """
+    Yields (start, end) character ranges of paragraph-sized spans.
+    Paragraphs longer than max_words are cut into groups of whole sentences.
+    """
+    for para in _PARAGRAPH.finditer(text):
+        if len(para.group().split()) <= max_words:
+            yield base_offset + para.start(), base_offset + para.end()
+            continue
+        group_start, group_words, group_end = None, 0, None
+        for sentence in _SENTENCE.finditer(para.group()):
+            if group_start is None:
+                group_start = sentence.start()
+            group_words += len(sentence.group().split())
+            group_end = sentence.end()
+            if group_words >= max_words:
+                yield base_offset + para.start() + group_start, base_offset + para.start() + group_end
+                group_start, group_words = None, 0
+        if group_start is not None:
+            yield base_offset + para.start() + group_start, base_offset + para.start() + group_end
+
+
+# --- Index ---
+class SearchResult:
+    __slots__ = ("doc_hash", "filename", "start", "end", "score", "snippet")
+
+    def __init__(self, doc_hash, filename, start, end, score, snippet):
+        self.doc_hash = doc_hash
+        self.filename = filename
+        self.start    = start
+        self.end      = end
+        self.score    = score
+        self.snippet  = snippet
+
+
+class SearchIndex:
+    """BM25 inverted index stored alongside a DocumentStore."""
+
+    def __init__(self, store):
+        self.store = store
+        self._stats = None
+        self._stats_time = 0.0
+        self._stats_lock = threading.Lock()
+        with self.store.transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    # ── indexing ──────────────────────────────────────────────────────────────
+
+    def is_indexed(self, doc_hash):
+        with self.store.transaction() as conn:
+            return conn.execute(
+                "SELECT 1 FROM search_spans WHERE doc_hash = ? LIMIT 1", (doc_hash,)
+            ).fetchone() is not None
+
+    def add_text(self, doc_hash, text, base_offset=0):
+        """
+        Index one piece of a document (e.g. a page as it comes out of the
+        extractor). `base_offset` is where the piece starts in the full text.
+        """
+        rows = []
+        for start, end in split_spans(text, base_offset):
+            tokens = tokenize(text[start - base_offset:end - base_offset])
+            if tokens:
+                rows.append((start, end, tokens))
+        if not rows:
+            return 0
+
+        with self.store.transaction() as conn:
+            for start, end, tokens in rows:
+                span_id = conn.execute(
+                    "INSERT INTO search_spans (doc_hash, start, end, length) VALUES (?, ?, ?, ?)",
+                    (doc_hash, start, end, len(tokens)),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO search_postings (term, span_id, tf) VALUES (?, ?, ?)",
+                    [(term, span_id, tf) for term, tf in Counter(tokens).items()],
+                )
+        self._stats = None
+        return len(rows)
+
+    def index_document(self, doc_hash, text, offsets=None):
+        """Index a whole document page by page; documents already indexed are skipped."""
+        if self.is_indexed(doc_hash):
+            return 0
+        bounds = list(offsets or [0]) + [len(text)]
+        return sum(
+            self.add_text(doc_hash, text[bounds[i]:bounds[i + 1]], bounds[i])
+            for i in range(len(bounds) - 1)
+        )
+
+    def remove_document(self, doc_hash):
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM search_spans WHERE doc_hash = ?", (doc_hash,))
+        self._stats = None
+
+    # ── querying ──────────────────────────────────────────────────────────────
+
+    def _corpus_stats(self, conn):
+        with self._stats_lock:
+            if self._stats is None or time.time() - self._stats_time > STATS_TTL:
+                count, avg_len = conn.execute(
+                    "SELECT COUNT(*), COALESCE(AVG(length), 0) FROM search_spans"
+                ).fetchone()
+                self._stats = (count, avg_len or 1.0)
+                self._stats_time = time.time()
+            return self._stats
+
+    def search(self, query, limit=5, doc_hash=None):
+        """
+        Returns up to `limit` SearchResult objects, best first.
+        Pass doc_hash to restrict the search to one document.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        scores = defaultdict(float)
+        spans = {}
+        with self.store.transaction() as conn:
+            n_spans, avg_len = self._corpus_stats(conn)
+            if n_spans == 0:
+                return []
+            for term in terms:
+                df = conn.execute(
+                    "SELECT COUNT(*) FROM search_postings WHERE term = ?", (term,)
+                ).fetchone()[0]
+                if df == 0:
+                    continue
+                idf = math.log(1 + (n_spans - df + 0.5) / (df + 0.5))
+                sql = (
+                    "SELECT p.span_id, p.tf, s.length, s.doc_hash, s.start, s.end "
+                    "FROM search_postings p JOIN search_spans s ON s.span_id = p.span_id "
+                    "WHERE p.term = ?"
+                )
+                params = (term,)
+                if doc_hash is not None:
+                    sql += " AND s.doc_hash = ?"
+                    params = (term, doc_hash)
+                for span_id, tf, length, span_doc, start, end in conn.execute(sql, params):
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                    scores[span_id] += idf * tf * (BM25_K1 + 1) / norm
+                    spans[span_id] = (span_doc, start, end)
+
+            # Fetch text only for the best candidates, then boost exact phrases
+            candidates = sorted(scores, key=scores.get, reverse=True)[:limit * 4]
+            phrase = " ".join(query.lower().split())
+            results = []
+            for span_id in candidates:
+                span_doc, start, end = spans[span_id]
+                row = conn.execute(
+                    "SELECT filename FROM documents WHERE doc_hash = ?", (span_doc,)
+                ).fetchone()
+                if row is None:
+                    continue   # evicted since it was indexed
+                filename = row[0]
+                snippet = self.store.read_range(span_doc, start, end)
+                score = scores[span_id]
+                if len(terms) > 1 and phrase in " ".join(snippet.lower().split()):
+                    score *= PHRASE_BOOST
+                results.append(SearchResult(span_doc, filename, start, end, score, snippet))
+
+        results.sort(key=lambda r: r.score, reverse=True)
+        return results[:limit]
+
+
+if __name__ == "__main__":
+    import sys
+    from store_utils import DocumentStore
+
+    index = SearchIndex(DocumentStore())
+    started = time.perf_counter()
+    hits = index.search(" ".join(sys.argv[1:]))
+    print(f"{len(hits)} result(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for hit in hits:
+        print(f"\n[{hit.score:.2f}] {hit.filename}  ({hit.start}-{hit.end})\n{hit.snippet[:300]}")
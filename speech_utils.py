@@ -4,14 +4,53 @@ import pyttsx3
 from gtts import gTTS
 import os
 import sys
+import queue
 import subprocess
 import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from text_utils import is_internet_available
 
 
 # --- Shared pyttsx3 engine (re-created on error) ---
 _tts_engine = None
 
+# When TapVision recently talked (speak_now(), audio playback, offline
+# speech), as [started, ended] monotonic times (ended is None while talking),
+# so the background listener can drop phrases that were really its own voice.
+ECHO_TAIL = 0.3   # seconds after talking during which the room still echoes
+_speech_log = deque(maxlen=32)
+_speaking_depth = 0
+_speaking_lock = threading.Lock()
+
+
+@contextmanager
+def _speaking_aloud():
+    """Marks TapVision as talking for the duration of the block; may be nested."""
+    global _speaking_depth
+    with _speaking_lock:
+        _speaking_depth += 1
+        if _speaking_depth == 1:
+            _speech_log.append([time.monotonic(), None])
+    try:
+        yield
+    finally:
+        with _speaking_lock:
+            _speaking_depth -= 1
+            if _speaking_depth == 0:
+                _speech_log[-1][1] = time.monotonic()
+
+
+def _was_speaking_at(moment):
+    """True if TapVision was talking (or its voice was still echoing) at a monotonic time."""
+    with _speaking_lock:
+        return any(
+            started <= moment and (ended is None or moment <= ended + ECHO_TAIL)
+            for started, ended in _speech_log
+        )
+
 def _get_pyttsx3_engine():
     global _tts_engine
     if _tts_engine is None:
@@ -20,25 +59,88 @@ def _get_pyttsx3_engine():
     return _tts_engine
 
 
+def _player_commands(path):
+    """Candidate command lines for playing an audio file on this OS."""
+    if sys.platform == "darwin":
+        return [["afplay", path]]
+    if sys.platform.startswith("linux"):
+        return [["mpg123", "-q", path], ["mpg321", "-q", path],
+                ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", path]]
+    return []
+
+
+def play_audio(path, interrupt=None):
+    """
+    Play an audio file using the OS audio player (no GUI needed).
+    If `interrupt` (a threading.Event) is set during playback the player is
+    stopped early. Returns False if playback was interrupted, else True.
+    """
+    if sys.platform == "win32":
+        os.startfile(path)
+        return True
+    with _speaking_aloud():   # e.g. a ReadingSession reading a book aloud
+        return _play_with_player(path, interrupt)
+
+
+def _play_with_player(path, interrupt):
+    for command in _player_commands(path):
+        try:
+            proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            continue
+        while True:
+            try:
+                code = proc.wait(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if interrupt is not None and interrupt.is_set():
+                    proc.terminate()
+                    proc.wait()
+                    return False
+        if code == 0:
+            return True
+    return True
+
+
 def _play_mp3(path):
     """Play an MP3 file using the OS default audio player (no GUI needed)."""
     try:
-        if sys.platform == "darwin":
-            subprocess.run(["afplay", path], check=True)
-        elif sys.platform.startswith("linux"):
-            for player in [["mpg123"], ["mpg321"], ["ffplay", "-nodisp", "-autoexit"]]:
-                try:
-                    subprocess.run(player + [path], check=True,
-                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                    return
-                except (FileNotFoundError, subprocess.CalledProcessError):
-                    continue
-        elif sys.platform == "win32":
-            os.startfile(path)
+        play_audio(path)
     except Exception as e:
         print(f"[TapVision] Audio playback error: {e}")
 
 
+def synthesize_speech(text, lang="en"):
+    """
+    Render text to a temporary MP3 with gTTS and return its path, or None if
+    offline or synthesis failed. The caller deletes the file when done.
+    """
+    if not text or not text.strip() or not is_internet_available():
+        return None
+    try:
+        tts = gTTS(text=text, lang=lang)
+        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
+            path = tmp.name
+        tts.save(path)
+        return path
+    except Exception as e:
+        print(f"[TapVision] gTTS error: {e}")
+        return None
+
+
+def speak_offline(text):
+    """Speak text with pyttsx3 (English only, blocking)."""
+    global _tts_engine
+    try:
+        engine = _get_pyttsx3_engine()
+        with _speaking_aloud():
+            engine.say(text)
+            engine.runAndWait()
+    except Exception as e:
+        print(f"[TapVision] pyttsx3 error: {e}")
+        _tts_engine = None  # force re-init next call
+
+
 def speak_now(text, lang="en"):
     """
     Speak text immediately on the local machine — no browser required.
@@ -58,27 +160,15 @@ def speak_now(text, lang="en"):
 
     print(f"[TapVision] Speaking: {text[:80]}{'…' if len(text) > 80 else ''}")
 
-    if is_internet_available():
-        try:
-            tts = gTTS(text=text, lang=lang)
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-                path = tmp.name
-            tts.save(path)
+    with _speaking_aloud():
+        path = synthesize_speech(text, lang)
+        if path:
             _play_mp3(path)
             os.remove(path)
             return
-        except Exception as e:
-            print(f"[TapVision] gTTS error: {e} — falling back to pyttsx3")
 
-    # Offline fallback
-    try:
-        global _tts_engine
-        engine = _get_pyttsx3_engine()
-        engine.say(text)
-        engine.runAndWait()
-    except Exception as e:
-        print(f"[TapVision] pyttsx3 error: {e}")
-        _tts_engine = None  # force re-init next call
+        # Offline fallback
+        speak_offline(text)
 
 # --- Speech Recognition ---
 def recognize_speech_from_mic(prompt="\U0001f3a4 Listening... Please speak now.", timeout_seconds=5):
@@ -103,6 +193,141 @@ def recognize_speech_from_mic(prompt="\U0001f3a4 Listening... Please speak now."
             st.error(f"❌ Voice recognition service unavailable. Check internet connection or API limits: {e}")
         return None
 
+# --- Continuous listening ---
+RECOGNIZER_BACKEND = os.environ.get("TAPVISION_RECOGNIZER", "auto")   # auto, google, sphinx, vosk
+WAKE_WORD          = os.environ.get("TAPVISION_WAKE_WORD", "").lower().strip() or None
+
+
+def _recognize(recognizer, audio, backend):
+    """Run one recognition backend; "auto" uses Google when online, else PocketSphinx."""
+    if backend == "auto":
+        backend = "google" if is_internet_available() else "sphinx"
+    if backend == "google":
+        return recognizer.recognize_google(audio)
+    if backend == "sphinx":
+        return recognizer.recognize_sphinx(audio)
+    if backend == "vosk":
+        import json
+        return json.loads(recognizer.recognize_vosk(audio)).get("text", "")
+    raise ValueError(f"Unknown recognizer backend: {backend}")
+
+
+class BackgroundListener:
+    """
+    Keeps the microphone open on a worker thread and pushes recognised
+    commands onto a queue, so callers never block on calibration or capture.
+
+    Ambient-noise calibration happens once, when the listener starts. Phrases
+    that begin while TapVision is talking (speak_now() or a ReadingSession
+    reading aloud) are discarded; a phrase that begins in a silence, such as
+    the short pause a ReadingSession leaves after each part, is kept even if
+    TapVision starts talking again before it ends. With a wake word, only
+    phrases that start with it are queued (with the wake word removed); those
+    are accepted even while TapVision is talking, so the user can interrupt
+    a reading at any moment.
+
+    For testing without a microphone, pass `wav_files`: each file is treated
+    as one phrase spoken at the moment the listener reads it, and the
+    listener stops after the last one.
+    """
+
+    def __init__(self, backend=RECOGNIZER_BACKEND, wake_word=WAKE_WORD,
+                 phrase_time_limit=8, wav_files=None):
+        self.backend           = backend
+        self.wake_word         = wake_word
+        self.phrase_time_limit = phrase_time_limit
+        self.wav_files         = list(wav_files) if wav_files else None
+        self.commands          = queue.Queue()
+        self.recognizer        = sr.Recognizer()
+        self._stop             = threading.Event()
+        self._thread           = None
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=3)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ── consumer API ──────────────────────────────────────────────────────────
+
+    def get_command(self, timeout=None):
+        """Next recognised command (lower-case), or None if none arrives in time."""
+        try:
+            return self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        """Drop commands that were spoken before the caller was ready for them."""
+        while True:
+            try:
+                self.commands.get_nowait()
+            except queue.Empty:
+                return
+
+    # ── worker ────────────────────────────────────────────────────────────────
+
+    def _handle_audio(self, audio, started_at):
+        if not self.wake_word and _was_speaking_at(started_at):
+            return   # we heard our own voice
+        try:
+            text = _recognize(self.recognizer, audio, self.backend)
+        except sr.UnknownValueError:
+            return
+        except (sr.RequestError, ImportError, OSError) as e:
+            print(f"[TapVision] Speech recognition unavailable ({self.backend}): {e}")
+            return
+        command = " ".join(text.lower().split())
+        if not command:
+            return
+        if self.wake_word:
+            if not command.startswith(self.wake_word):
+                return
+            command = command[len(self.wake_word):].strip(" ,.")
+            if not command:
+                return
+        print(f"[TapVision] Heard: {command}")
+        self.commands.put(command)
+
+    def _run(self):
+        if self.wav_files is not None:
+            for path in self.wav_files:
+                if self._stop.is_set():
+                    break
+                with sr.AudioFile(path) as source:
+                    self._handle_audio(self.recognizer.record(source), time.monotonic())
+            return
+
+        try:
+            with sr.Microphone() as source:
+                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+                self.recognizer.dynamic_energy_threshold = True
+                while not self._stop.is_set():
+                    try:
+                        audio = self.recognizer.listen(
+                            source, timeout=1, phrase_time_limit=self.phrase_time_limit
+                        )
+                    except sr.WaitTimeoutError:
+                        continue
+                    # listen() keeps non_speaking_duration of silence on either side of the
+                    # phrase, and returns once pause_threshold of silence has followed it
+                    r = self.recognizer
+                    spoken = len(audio.frame_data) / (audio.sample_rate * audio.sample_width) - r.non_speaking_duration
+                    started_at = time.monotonic() - spoken - max(0.0, r.pause_threshold - r.non_speaking_duration)
+                    self._handle_audio(audio, started_at)
+        except (OSError, AttributeError) as e:
+            print(f"[TapVision] Microphone unavailable: {e}")
+
+
 # --- Text-to-Speech ---
 def text_to_speech_with_gtts(text, lang="en"):
     """Converts text to speech using Google Text-to-Speech (online)."""
@@ -0,0 +1,406 @@
+"""
+Local document store for TapVision.
+
+Extracted text, page/chapter offsets, summaries and translations are kept in
+a SQLite database keyed by the SHA-256 of the input, so a file that has been
+seen before (dropped into the watcher inbox again, or re-uploaded in the web
+app) is answered without repeating OCR, extraction or summarization.
+
+Text is kept in fixed-size chunk rows, so a page or window of a very large
+document is read without loading the rest of it.
+
+The store is bounded: compact() evicts the least recently used documents
+once the total text size or document age exceeds the configured limits.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+STORE_PATH = os.environ.get(
+    "TAPVISION_STORE",
+    os.path.expanduser("~/TapVision/store.db"),
+)
+
+MAX_STORE_MB   = int(os.environ.get("TAPVISION_STORE_MAX_MB", "500"))
+MAX_AGE_DAYS   = int(os.environ.get("TAPVISION_STORE_MAX_AGE_DAYS", "90"))
+COMPACT_EVERY  = 50   # writes between automatic compactions
+CHUNK_CHARS    = 16_384   # characters per document_chunks row
+VACUUM_FREE    = 0.25     # share of free pages that makes a VACUUM worth its rewrite
+
+_HASH_CHUNK = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_hash     TEXT PRIMARY KEY,
+    filename     TEXT,
+    file_type    TEXT,
+    offsets      TEXT NOT NULL DEFAULT '[0]',
+    text_bytes   INTEGER NOT NULL,
+    text_chars   INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    accessed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_accessed ON documents(accessed_at);
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    doc_hash  TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    seq       INTEGER NOT NULL,
+    text      TEXT NOT NULL,
+    PRIMARY KEY (doc_hash, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS summaries (
+    doc_hash  TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    preset    TEXT NOT NULL,
+    summary   TEXT NOT NULL,
+    PRIMARY KEY (doc_hash, preset)
+);
+
+CREATE TABLE IF NOT EXISTS translations (
+    source_hash TEXT NOT NULL,
+    lang        TEXT NOT NULL,
+    preset      TEXT NOT NULL,
+    doc_hash    TEXT REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    translated  TEXT NOT NULL,
+    PRIMARY KEY (source_hash, lang, preset)
+);
+"""
+
+
+# --- Hashing ---
+def text_sha256(text):
+    """Content hash of a string (used for pasted text, URLs and translation sources)."""
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def file_sha256(source):
+    """
+    Content hash of a file, streamed in 1 MB blocks.
+    Accepts a path, an in-memory upload (BytesIO / Streamlit UploadedFile)
+    or any seekable binary file object, whose position is restored afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+                digest.update(block)
+    elif hasattr(source, "getbuffer"):
+        digest.update(source.getbuffer())
+    else:
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(_HASH_CHUNK), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+# --- Store ---
+class StoredDocument:
+    """A document row returned by DocumentStore.get()."""
+
+    __slots__ = ("doc_hash", "filename", "file_type", "text", "offsets")
+
+    def __init__(self, doc_hash, filename, file_type, text, offsets):
+        self.doc_hash  = doc_hash
+        self.filename  = filename
+        self.file_type = file_type
+        self.text      = text
+        self.offsets   = offsets
+
+    def pages(self):
+        """Splits the text back into the pages/chapters it was extracted from."""
+        bounds = list(self.offsets) + [len(self.text)]
+        return [self.text[bounds[i]:bounds[i + 1]] for i in range(len(self.offsets))]
+
+
+class DocumentStore:
+    """
+    Thread-safe SQLite store shared by the watcher threads or by all
+    Streamlit sessions in one process.
+    """
+
+    def __init__(self, path=STORE_PATH, max_mb=MAX_STORE_MB, max_age_days=MAX_AGE_DAYS):
+        self.path         = path
+        self.max_bytes    = max_mb * 1024 * 1024
+        self.max_age_days = max_age_days
+        self._lock        = threading.RLock()
+        self._writes      = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields the shared connection under the store lock and commits on exit.
+        Lets other components (e.g. the search index) keep their tables in the
+        same database, so evicting a document cascades to them.
+        """
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    # ── documents ─────────────────────────────────────────────────────────────
+
+    def get(self, doc_hash):
+        """Returns the StoredDocument for a content hash, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_hash, filename, file_type, offsets FROM documents WHERE doc_hash = ?",
+                (doc_hash,),
+            ).fetchone()
+            if row is None:
+                return None
+            text = "".join(chunk for (chunk,) in self._conn.execute(
+                "SELECT text FROM document_chunks WHERE doc_hash = ? ORDER BY seq", (doc_hash,)
+            ))
+            self._conn.execute(
+                "UPDATE documents SET accessed_at = ? WHERE doc_hash = ?", (time.time(), doc_hash)
+            )
+            self._conn.commit()
+        return StoredDocument(row[0], row[1], row[2], text, json.loads(row[3]))
+
+    def put(self, doc_hash, text, offsets=None, filename=None, file_type=None):
+        """Stores (or replaces) the extracted text of a document."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO documents (doc_hash, filename, file_type, offsets, text_bytes, text_chars,
+                                       created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_hash) DO UPDATE SET
+                    filename = excluded.filename, file_type = excluded.file_type,
+                    offsets = excluded.offsets, text_bytes = excluded.text_bytes,
+                    text_chars = excluded.text_chars, accessed_at = excluded.accessed_at
+                """,
+                (doc_hash, filename, file_type, json.dumps(list(offsets or [0])),
+                 len(text.encode("utf-8", errors="ignore")), len(text), now, now),
+            )
+            self._conn.execute("DELETE FROM document_chunks WHERE doc_hash = ?", (doc_hash,))
+            self._conn.executemany(
+                "INSERT INTO document_chunks (doc_hash, seq, text) VALUES (?, ?, ?)",
+                ((doc_hash, i // CHUNK_CHARS, text[i:i + CHUNK_CHARS]) for i in range(0, len(text), CHUNK_CHARS)),
+            )
+            self._conn.commit()
+            self._after_write()
+
+    def put_pieces(self, doc_hash, pieces, offsets=None, filename=None, file_type=None):
+        """
+        Like put(), for text produced piece by piece (e.g. a translation made
+        window by window). Only one chunk row is held at a time, and each is
+        committed on its own so the store is not locked while pieces are being
+        produced. The length is recorded last: until then length() is 0, which
+        marks the document as incomplete. Returns the number of characters.
+        """
+        self.put(doc_hash, "", offsets, filename=filename, file_type=file_type)
+        seq, buffer, chars, size = 0, "", 0, 0
+        for piece in pieces:
+            buffer += piece
+            chars += len(piece)
+            size += len(piece.encode("utf-8", errors="ignore"))
+            while len(buffer) >= CHUNK_CHARS:
+                self._put_chunk(doc_hash, seq, buffer[:CHUNK_CHARS])
+                seq, buffer = seq + 1, buffer[CHUNK_CHARS:]
+        if buffer:
+            self._put_chunk(doc_hash, seq, buffer)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE documents SET text_chars = ?, text_bytes = ? WHERE doc_hash = ?", (chars, size, doc_hash)
+            )
+            self._conn.commit()
+        return chars
+
+    def _put_chunk(self, doc_hash, seq, text):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO document_chunks (doc_hash, seq, text) VALUES (?, ?, ?)", (doc_hash, seq, text)
+            )
+            self._conn.commit()
+
+    def length(self, doc_hash):
+        """Length of a stored document's text in characters (recorded at write time), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_chars FROM documents WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read_range(self, doc_hash, start, end):
+        """
+        Characters [start, end) of a stored document. Only the chunk rows
+        covering the range are read, so paging through a large document costs
+        the same per page whatever its size.
+        """
+        if end <= start:
+            return ""
+        first, last = start // CHUNK_CHARS, (end - 1) // CHUNK_CHARS
+        with self._lock:
+            chunks = self._conn.execute(
+                "SELECT text FROM document_chunks WHERE doc_hash = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+                (doc_hash, first, last),
+            ).fetchall()
+        text = "".join(chunk for (chunk,) in chunks)
+        offset = start - first * CHUNK_CHARS
+        return text[offset:offset + end - start]
+
+    def iter_windows(self, doc_hash, window_chars):
+        """
+        Yields a stored document's text in consecutive windows of at most
+        window_chars characters, cut at the last paragraph break, line break
+        or space in each window so that no word is split between windows.
+        """
+        total = self.length(doc_hash) or 0
+        start = 0
+        while start < total:
+            window = self.read_range(doc_hash, start, start + window_chars)
+            if not window:
+                return
+            if start + len(window) < total:
+                for separator in ("\n\n", "\n", " "):
+                    cut = window.rfind(separator)
+                    if cut > len(window) // 2:
+                        window = window[:cut + len(separator)]
+                        break
+            yield window
+            start += len(window)
+
+    def __contains__(self, doc_hash):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM documents WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone() is not None
+
+    # ── summaries ─────────────────────────────────────────────────────────────
+
+    def get_summary(self, doc_hash, preset):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE doc_hash = ? AND preset = ?", (doc_hash, preset)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_summary(self, doc_hash, preset, summary):
+        with self._lock:
+            if doc_hash not in self:
+                return  # summaries only live as long as their document
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (doc_hash, preset, summary) VALUES (?, ?, ?)",
+                (doc_hash, preset, summary),
+            )
+            self._conn.commit()
+
+    # ── translations ──────────────────────────────────────────────────────────
+
+    def get_translation(self, source_text, lang, preset):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated FROM translations WHERE source_hash = ? AND lang = ? AND preset = ?",
+                (text_sha256(source_text), lang, preset),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_translation(self, source_text, lang, preset, translated, doc_hash=None):
+        with self._lock:
+            if doc_hash is not None and doc_hash not in self:
+                doc_hash = None
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO translations (source_hash, lang, preset, doc_hash, translated)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (text_sha256(source_text), lang, preset, doc_hash, translated),
+            )
+            self._conn.commit()
+            self._after_write()
+
+    # ── compaction / eviction ─────────────────────────────────────────────────
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes % COMPACT_EVERY == 0:
+            self.compact(vacuum=False)
+
+    def compact(self, vacuum=True):
+        """
+        Evicts documents older than max_age_days (by last access), then the
+        least recently used ones until the stored text fits in max_bytes.
+        Summaries and linked translations are removed with their document;
+        orphan translations are dropped by age. The file is only rewritten
+        (VACUUM) when at least VACUUM_FREE of its pages are free, since SQLite
+        reuses free pages for new writes anyway. Returns the number of
+        documents evicted.
+        """
+        with self._lock:
+            cutoff = time.time() - self.max_age_days * 86400
+            evicted = self._conn.execute(
+                "DELETE FROM documents WHERE accessed_at < ?", (cutoff,)
+            ).rowcount
+
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(text_bytes), 0) FROM documents"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                doomed = []
+                for doc_hash, size in self._conn.execute(
+                    "SELECT doc_hash, text_bytes FROM documents ORDER BY accessed_at ASC"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((doc_hash,))
+                    total -= size
+                self._conn.executemany("DELETE FROM documents WHERE doc_hash = ?", doomed)
+                evicted += len(doomed)
+
+            # Translations of pasted text or one-off summaries have no document
+            # row to expire with; cap them so they do not grow without bound.
+            self._conn.execute(
+                """
+                DELETE FROM translations WHERE doc_hash IS NULL AND rowid NOT IN (
+                    SELECT rowid FROM translations WHERE doc_hash IS NULL ORDER BY rowid DESC LIMIT 10000
+                )
+                """
+            )
+            self._conn.commit()
+            if vacuum and self._free_share() >= VACUUM_FREE:
+                self._conn.execute("VACUUM")
+        return evicted
+
+    def _free_share(self):
+        pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return free / pages if pages else 0.0
+
+    def stats(self):
+        with self._lock:
+            docs, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(text_bytes), 0) FROM documents"
+            ).fetchone()
+        return {"documents": docs, "text_mb": round(size / (1024 * 1024), 2)}
+
+
+if __name__ == "__main__":
+    import sys
+    store = DocumentStore()
+    if "--compact" in sys.argv:
+        print(f"Evicted {store.compact()} document(s).")
+    print(store.stats())
@@ -0,0 +1,52 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from inbox_utils import InboxMonitor
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    folder = tmp_path / "inbox"
+    folder.mkdir()
+    ready, duplicates = [], []
+    event = threading.Event()
+
+    def record(target):
+        def callback(path):
+            target.append((time.monotonic(), path))
+            event.set()
+        return callback
+
+    monitor = InboxMonitor(str(folder), record(ready), record(duplicates)).start()
+    time.sleep(0.2)
+    yield folder, ready, duplicates, event
+    monitor.stop()
+
+
+def test_file_moved_in_from_another_folder_is_released_promptly(inbox, tmp_path):
+    folder, ready, _, event = inbox
+    outside = tmp_path / "report.txt"
+    outside.write_text("quarterly report")
+    moved_at = time.monotonic()
+    shutil.move(str(outside), str(folder / "report.txt"))
+    assert event.wait(3)
+    assert ready[0][1] == str(folder / "report.txt")
+    assert ready[0][0] - moved_at < 1.0
+
+
+def test_same_file_dropped_again_goes_to_the_duplicate_callback(inbox, tmp_path):
+    folder, ready, duplicates, event = inbox
+    target = folder / "letter.txt"
+    target.write_text("dear customer")
+    assert event.wait(3)
+    event.clear()
+    os.remove(target)   # the watcher moved it to processed
+    time.sleep(0.1)
+    target.write_text("dear customer")
+    assert event.wait(3)
+    assert [path for _, path in duplicates] == [str(target)]
+    assert len(ready) == 1
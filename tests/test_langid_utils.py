@@ -0,0 +1,60 @@
+from langid_utils import MIN_CONFIDENCE, detect_language, split_by_language
+
+BUSINESS_SENTENCES = [
+    "Quarterly revenue increased 12% year-over-year driven by strong performance in cloud services.",
+    "Net income rose to $4.2 billion as operating margins expanded.",
+    "The board approved a dividend of 35 cents per share, payable in March.",
+    "Headcount was flat at 12,400 employees across all regions.",
+]
+
+HEADINGS = [
+    "### Multi-Language Translation",
+    "Project Structure and Setup Instructions",
+    "## Text-to-Speech",
+    "Install",
+]
+
+FRENCH = (
+    "Le gouvernement a annoncé hier une série de mesures destinées à soutenir les petites entreprises "
+    "touchées par la hausse des prix de l'énergie. Les aides seront versées dès le mois prochain aux "
+    "sociétés qui en feront la demande, et un guichet unique sera ouvert dans chaque région."
+)
+
+ENGLISH = (
+    "The government announced yesterday a series of measures intended to support small businesses "
+    "affected by rising energy prices. The payments will be made from next month to companies that "
+    "apply for them, and a single office will be opened in every region to handle the requests."
+)
+
+
+def test_short_english_sentences_stay_english():
+    for sentence in BUSINESS_SENTENCES:
+        assert split_by_language(sentence) == [("en", 0, len(sentence))], sentence
+
+
+def test_english_headings_stay_english():
+    for heading in HEADINGS:
+        assert [lang for lang, _, _ in split_by_language(heading)] == ["en"], heading
+
+
+def test_english_report_with_headings_and_figures_is_one_run():
+    text = "\n\n".join([HEADINGS[0], *BUSINESS_SENTENCES, HEADINGS[1], ENGLISH])
+    assert split_by_language(text) == [("en", 0, len(text))]
+
+
+def test_unconfident_chunks_take_document_language():
+    text = "\n\n".join([FRENCH, BUSINESS_SENTENCES[0], FRENCH])
+    assert [lang for lang, _, _ in split_by_language(text)] == ["fr"]
+
+
+def test_confident_foreign_paragraph_is_routed():
+    text = ENGLISH + "\n\n" + FRENCH + "\n\n" + ENGLISH
+    runs = split_by_language(text)
+    assert [lang for lang, _, _ in runs] == ["en", "fr", "en"]
+    assert text[runs[1][1]:runs[1][2]].strip() == FRENCH
+
+
+def test_confidence_is_reported():
+    lang, confidence = detect_language(FRENCH)
+    assert lang == "fr" and confidence >= MIN_CONFIDENCE
+    assert detect_language("Too short.") == (None, 0.0)
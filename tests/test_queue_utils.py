@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from queue_utils import JobQueue
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    def drop(name, size=10):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return str(path)
+    return drop
+
+
+def test_claims_by_priority_then_size_then_arrival(tmp_path, inbox):
+    jobs = JobQueue(str(tmp_path / "jobs.db"))
+    scan, pdf, first, second, big = (inbox("scan.png"), inbox("report.pdf"), inbox("a.txt"),
+                                     inbox("b.txt"), inbox("big.txt", size=1000))
+    for path in (scan, pdf, big, first, second):
+        jobs.enqueue(path)
+    assert [jobs.claim(timeout=0).path for _ in range(5)] == [first, second, big, pdf, scan]
+    assert jobs.claim(timeout=0) is None
+
+
+def test_enqueue_ignores_a_path_that_is_already_queued(tmp_path, inbox):
+    jobs = JobQueue(str(tmp_path / "jobs.db"))
+    path = inbox("a.txt")
+    assert jobs.enqueue(path) is not None
+    assert jobs.enqueue(path) is None
+
+
+def test_failed_job_is_retried_after_backoff(tmp_path, inbox):
+    jobs = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, backoff=0.2)
+    jobs.enqueue(inbox("a.txt"))
+    job = jobs.claim(timeout=0)
+    assert jobs.fail(job, "file locked") is True
+    assert jobs.claim(timeout=0.05) is None   # still backing off
+    started = time.monotonic()
+    retry = jobs.claim(timeout=2)
+    assert retry.id == job.id and retry.attempts == 2
+    assert time.monotonic() - started >= 0.1
+    assert jobs.fail(retry, "file locked") is True   # second delay doubles
+    assert jobs.claim(timeout=0.3) is None
+
+
+def test_fail_gives_up_after_max_attempts(tmp_path, inbox):
+    jobs = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2, backoff=0)
+    jobs.enqueue(inbox("a.txt"))
+    assert jobs.fail(jobs.claim(timeout=0), "boom") is True
+    assert jobs.fail(jobs.claim(timeout=1), "boom") is False
+    assert jobs.counts() == {"failed": 1}
+    assert jobs.claim(timeout=0) is None
+
+
+def test_non_retryable_failure_fails_at_once(tmp_path, inbox):
+    jobs = JobQueue(str(tmp_path / "jobs.db"))
+    jobs.enqueue(inbox("a.txt"))
+    assert jobs.fail(jobs.claim(timeout=0), "unsupported", retryable=False) is False
+    assert jobs.counts() == {"failed": 1}
+
+
+def test_recover_resumes_jobs_in_flight_when_the_process_died(tmp_path, inbox):
+    db = str(tmp_path / "jobs.db")
+    jobs = JobQueue(db)
+    running, ready, waiting, done = inbox("a.txt"), inbox("b.txt"), inbox("c.txt"), inbox("d.txt")
+    for path in (done, running, ready, waiting):
+        jobs.enqueue(path)
+    jobs.complete(jobs.claim(timeout=0).id)
+    jobs.claim(timeout=0)                     # crashes while extracting
+    jobs.mark_ready(jobs.claim(timeout=0).id)  # crashes before speaking
+    jobs.close()
+
+    restarted = JobQueue(db)
+    assert restarted.recover() == 2
+    assert restarted.counts() == {"done": 1, "pending": 3}
+    claimed = {restarted.claim(timeout=0).path for _ in range(3)}
+    assert claimed == {running, ready, waiting}
+
+
+def test_recover_drops_jobs_whose_file_is_gone(tmp_path, inbox):
+    db = str(tmp_path / "jobs.db")
+    jobs = JobQueue(db)
+    path = inbox("a.txt")
+    jobs.enqueue(path)
+    jobs.claim(timeout=0)
+    jobs.close()
+    (tmp_path / "a.txt").unlink()
+    restarted = JobQueue(db)
+    assert restarted.recover() == 0
+    assert restarted.counts() == {}
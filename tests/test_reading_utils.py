@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+import pytest
+
+import reading_utils
+from reading_utils import ReadingPositions, ReadingSession, document_headings
+from store_utils import DocumentStore
+from text_utils import StructuredDocument
+
+
+def _structure():
+    doc = StructuredDocument()
+    for section, title in enumerate(("Introduction", "Pricing", "Refund policy")):
+        doc.add("heading", title, section, 1)
+        doc.add("paragraph", f"What the {title.lower()} section says. " * 5, section)
+    return doc.finish()
+
+
+def test_headings_are_stored_with_the_document():
+    store = DocumentStore(":memory:")
+    positions = ReadingPositions(store)
+    structure = _structure()
+    store.put("doc", structure.text)
+    positions.save_headings("doc", document_headings(structure))
+    assert [title for title, _, _ in positions.headings("doc")] == ["Introduction", "Pricing", "Refund policy"]
+    assert positions.headings("missing") == []
+
+
+def test_heading_offsets_map_to_the_segment_that_starts_there():
+    structure = _structure()
+    session = ReadingSession("doc", structure.text)
+    for title, _, offset in document_headings(structure):
+        start, end = session.segments[session.segment_at(offset)]
+        assert structure.text[start:end] == title
+
+
+# --- Playback (audio stubbed) ---
+TEXT = "\n\n".join(f"Paragraph number {i} of the letter." for i in range(5))
+
+
+def _wait_for(predicate, timeout=3):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class _Player:
+    """Stands in for play_audio(): a segment plays until finish() or an interrupt."""
+
+    def __init__(self):
+        self.played = []
+        self._done  = threading.Event()
+
+    def __call__(self, path, interrupt=None):
+        self.played.append(os.path.basename(path))
+        while not interrupt.is_set():
+            if self._done.wait(0.01):
+                self._done.clear()
+                return True
+        return False
+
+    def finish(self):
+        self._done.set()
+
+
+@pytest.fixture
+def player(tmp_path, monkeypatch):
+    player = _Player()
+    counter = iter(range(10_000))
+
+    def synthesize(text, lang="en"):
+        path = tmp_path / f"{text.split()[2]}-{next(counter)}.mp3"
+        path.write_bytes(b"mp3")
+        return str(path)
+
+    monkeypatch.setattr(reading_utils, "play_audio", player)
+    monkeypatch.setattr(reading_utils, "synthesize_speech", synthesize)
+    monkeypatch.setattr(reading_utils, "LISTEN_GAP", 0)
+    player.audio_dir = tmp_path
+    return player
+
+
+def _segment(player, i=-1):
+    return player.played[i].split("-")[0]
+
+
+def test_next_and_back_move_between_segments(player):
+    session = ReadingSession("doc", TEXT)
+    session.start()
+    _wait_for(lambda: player.played)
+    session.next()
+    _wait_for(lambda: _segment(player) == "1")
+    session.next()
+    _wait_for(lambda: _segment(player) == "2")
+    session.back()
+    _wait_for(lambda: _segment(player) == "1" and len(player.played) == 4)
+    assert session.progress == (2, 5)
+    session.stop()
+
+
+def test_pause_and_resume_replay_the_current_segment(player):
+    session = ReadingSession("doc", TEXT)
+    session.start()
+    _wait_for(lambda: player.played)
+    player.finish()
+    _wait_for(lambda: _segment(player) == "1")
+    session.pause()
+    assert not session.is_playing() and session.is_active()
+    session.resume()
+    _wait_for(lambda: len(player.played) == 3)
+    assert _segment(player) == "1"
+    session.stop()
+
+
+def test_position_is_saved_and_cleared_when_finished(player):
+    store = DocumentStore(":memory:")
+    store.put("doc", TEXT)
+    positions = ReadingPositions(store)
+    session = ReadingSession("doc", TEXT, positions=positions)
+    session.start()
+    _wait_for(lambda: player.played)
+    session.next()
+    session.next()
+    _wait_for(lambda: _segment(player) == "2")
+    session.stop()
+    assert positions.get("doc") == 2
+
+    played = len(player.played)
+    resumed = ReadingSession("doc", TEXT, positions=positions)
+    resumed.start(from_saved=True)
+    _wait_for(lambda: len(player.played) > played)
+    assert _segment(player) == "2"
+    for expected in ("3", "4"):
+        player.finish()
+        _wait_for(lambda: _segment(player) == expected)
+    player.finish()
+    _wait_for(lambda: not resumed.is_active())
+    assert positions.get("doc") == 0
+
+
+def test_stop_deletes_synthesized_audio(player):
+    session = ReadingSession("doc", TEXT)
+    session.start()
+    _wait_for(lambda: player.played)
+    session.stop()
+    assert list(player.audio_dir.iterdir()) == []
+
+
+def test_audio_finished_after_stop_is_deleted(player, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    made = []
+
+    def slow_synthesize(text, lang="en"):
+        started.set()
+        release.wait(3)
+        path = player.audio_dir / f"late-{len(made)}.mp3"
+        path.write_bytes(b"mp3")
+        made.append(path)
+        return str(path)
+
+    monkeypatch.setattr(reading_utils, "synthesize_speech", slow_synthesize)
+    session = ReadingSession("doc", TEXT)
+    session.start()
+    assert started.wait(3)
+    session.stop()   # gives up waiting for the synthesis after a couple of seconds
+    release.set()
+    _wait_for(lambda: all(not t.is_alive() for t in session._threads))
+    assert made and not any(path.exists() for path in made)
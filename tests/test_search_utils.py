@@ -0,0 +1,19 @@
+from search_utils import SearchIndex
+from store_utils import DocumentStore
+
+TEXT = (
+    "Opening hours are nine to five on weekdays.\n\n"
+    "Refunds are paid within fourteen days of the return.\n\n"
+    "Deliveries take three working days."
+)
+
+
+def test_hits_carry_the_passage_text():
+    store = DocumentStore(":memory:")
+    store.put("doc", TEXT, filename="policy.txt")
+    index = SearchIndex(store)
+    index.index_document("doc", TEXT)
+    hits = index.search("refund")
+    assert hits[0].filename == "policy.txt"
+    assert hits[0].snippet == "Refunds are paid within fourteen days of the return."
+    assert TEXT[hits[0].start:hits[0].end] == hits[0].snippet
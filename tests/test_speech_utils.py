@@ -0,0 +1,57 @@
+import time
+import wave
+
+import pytest
+import speech_recognition as sr
+
+import speech_utils
+from speech_utils import BackgroundListener, _speaking_aloud
+
+
+@pytest.fixture
+def phrase(tmp_path, monkeypatch):
+    """A short WAV file that the (stubbed) recognizer hears as "pause"."""
+    path = tmp_path / "pause.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 1600)
+    monkeypatch.setattr(speech_utils, "_recognize", lambda recognizer, audio, backend: "Pause")
+    return str(path)
+
+
+def _heard(listener):
+    listener.start()._thread.join(timeout=5)
+    return listener.get_command(timeout=0)
+
+
+def test_phrase_in_the_pause_between_parts_is_heard(phrase):
+    with _speaking_aloud():   # a part being read aloud
+        pass
+    time.sleep(speech_utils.ECHO_TAIL + 0.05)
+    assert _heard(BackgroundListener(wake_word=None, wav_files=[phrase])) == "pause"
+
+
+def test_phrase_while_talking_is_taken_for_an_echo(phrase):
+    with _speaking_aloud():
+        assert _heard(BackgroundListener(wake_word=None, wav_files=[phrase])) is None
+
+
+def test_wake_word_interrupts_while_talking(phrase, monkeypatch):
+    monkeypatch.setattr(speech_utils, "_recognize", lambda recognizer, audio, backend: "TapVision, pause")
+    with _speaking_aloud():
+        assert _heard(BackgroundListener(wake_word="tapvision", wav_files=[phrase])) == "pause"
+
+
+def test_phrase_started_in_a_pause_survives_the_next_part(phrase):
+    with _speaking_aloud():
+        pass
+    time.sleep(speech_utils.ECHO_TAIL + 0.05)
+    started = time.monotonic()   # the user starts speaking in the pause...
+    time.sleep(0.01)
+    listener = BackgroundListener(wake_word=None)
+    with _speaking_aloud():      # ...and the next part begins before they finish
+        with sr.AudioFile(phrase) as source:
+            listener._handle_audio(listener.recognizer.record(source), started)
+    assert listener.get_command(timeout=0) == "pause"
@@ -0,0 +1,63 @@
+from store_utils import CHUNK_CHARS, DocumentStore
+
+TEXT = "".join(f"Paragraph {i} of the document.\n\n" for i in range(5000))
+
+
+def test_read_range_spans_chunk_rows():
+    store = DocumentStore(":memory:")
+    store.put("doc", TEXT)
+    assert store.length("doc") == len(TEXT)
+    start = CHUNK_CHARS - 10
+    assert store.read_range("doc", start, start + 2 * CHUNK_CHARS) == TEXT[start:start + 2 * CHUNK_CHARS]
+    assert store.get("doc").text == TEXT
+
+
+def test_windows_cover_text_without_splitting_or_doubling_breaks():
+    store = DocumentStore(":memory:")
+    store.put("doc", TEXT)
+    windows = list(store.iter_windows("doc", 10_000))
+    assert "".join(windows) == TEXT
+    assert all(window.endswith("\n\n") for window in windows)
+
+
+def test_replacing_a_document_replaces_its_chunks():
+    store = DocumentStore(":memory:")
+    store.put("doc", TEXT)
+    store.put("doc", "short")
+    assert store.get("doc").text == "short"
+    assert store.read_range("doc", 0, CHUNK_CHARS * 3) == "short"
+
+
+def test_compact_only_vacuums_after_freeing_a_large_share(tmp_path):
+    store = DocumentStore(str(tmp_path / "store.db"))
+    for i in range(10):
+        store.put(f"doc{i}", TEXT + str(i))
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    store.compact()
+    assert "VACUUM" not in statements
+    store.max_bytes = len(TEXT) * 2
+    store.compact()
+    assert "VACUUM" in statements
+
+
+def test_put_pieces_matches_put():
+    store = DocumentStore(":memory:")
+    pieces = [TEXT[i:i + 7_000] for i in range(0, len(TEXT), 7_000)]
+    assert store.put_pieces("doc", iter(pieces), file_type="translation") == len(TEXT)
+    assert store.length("doc") == len(TEXT)
+    assert store.get("doc").text == TEXT
+    start = CHUNK_CHARS * 2 - 5
+    assert store.read_range("doc", start, start + 100) == TEXT[start:start + 100]
+
+
+def test_put_pieces_is_incomplete_until_the_last_piece():
+    store = DocumentStore(":memory:")
+
+    def pieces():
+        yield "x" * (CHUNK_CHARS + 1)
+        assert store.length("doc") == 0
+        yield "y"
+
+    store.put_pieces("doc", pieces())
+    assert store.length("doc") == CHUNK_CHARS + 2
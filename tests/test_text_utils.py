@@ -0,0 +1,23 @@
+import io
+
+from text_utils import read_plain_text
+
+
+def test_uploads_are_read_from_their_buffer_not_a_same_named_file(tmp_path, monkeypatch):
+    (tmp_path / "notes.txt").write_text("SERVER SECRET")
+    monkeypatch.chdir(tmp_path)
+    upload = io.BytesIO(b"uploaded text")
+    upload.name = "notes.txt"
+    assert read_plain_text(upload) == "uploaded text"
+    upload = io.BytesIO(b"uploaded text")
+    upload.name = str(tmp_path / "notes.txt")
+    assert read_plain_text(upload) == "uploaded text"
+
+
+def test_files_opened_from_disk_are_read_by_path(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_text("on disk")
+    with open(path, "rb") as f:
+        assert read_plain_text(f) == "on disk"
+    assert read_plain_text(str(path)) == "on disk"
+
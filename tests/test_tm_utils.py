@@ -0,0 +1,52 @@
+import pytest
+
+from store_utils import DocumentStore
+from tm_utils import TranslationMemory
+
+
+@pytest.fixture
+def memory():
+    return TranslationMemory(DocumentStore(":memory:"), fuzzy_threshold=0.9)
+
+
+def test_exact_hit_requires_same_numbers(memory):
+    memory.add("The fee is 20 euros per month.", "fr", "best", "Les frais sont de 20 euros par mois.")
+    assert memory.lookup("The fee is  20 euros per MONTH.", "fr", "best") == "Les frais sont de 20 euros par mois."
+
+
+def test_numbers_are_transferred_when_each_is_found_once(memory):
+    memory.add("The fee is 20 euros per month.", "fr", "best", "Les frais sont de 20 euros par mois.")
+    assert memory.lookup("The fee is 35 euros per month.", "fr", "best") == "Les frais sont de 35 euros par mois."
+
+
+def test_spelled_out_number_is_a_miss(memory):
+    memory.add("Delivery takes 3 days.", "fr", "best", "La livraison prend trois jours.")
+    assert memory.lookup("Delivery takes 5 days.", "fr", "best") is None
+
+
+def test_repeated_numbers_are_a_miss(memory):
+    memory.add("Pay 10 now and 10 later.", "fr", "best", "Payez 10 maintenant et 10 plus tard.")
+    assert memory.lookup("Pay 10 now and 20 later.", "fr", "best") is None
+
+
+def test_negation_is_never_reused(memory):
+    memory.add("You can cancel the contract at any time.", "fr", "best",
+               "Vous pouvez résilier le contrat à tout moment.")
+    assert memory.lookup("You cannot cancel the contract at any time.", "fr", "best") is None
+    assert memory.lookup("You can not cancel the contract at any time.", "fr", "best") is None
+
+
+def test_changed_content_words_are_never_reused(memory):
+    memory.add("Customers who cancel receive a full refund.", "fr", "best",
+               "Les clients qui annulent reçoivent un remboursement complet.")
+    assert memory.lookup("Customers who cancel receive a partial refund.", "fr", "best") is None
+    memory.add("The office is open on Mondays and Fridays.", "fr", "best",
+               "Le bureau est ouvert le lundi et le vendredi.")
+    assert memory.lookup("The office is open on Mondays and Thursdays.", "fr", "best") is None
+
+
+def test_function_word_differences_are_reused(memory):
+    memory.add("The office is open on Mondays and Fridays.", "fr", "best",
+               "Le bureau est ouvert le lundi et le vendredi.")
+    assert memory.lookup("The office is open on the Mondays and Fridays.", "fr", "best") \
+        == "Le bureau est ouvert le lundi et le vendredi."
@@ -9,19 +9,54 @@ import ebooklib
 from ebooklib import epub
 import socket
 import os
+import codecs
+import mmap
+import re
+from array import array
+from collections import Counter, namedtuple
 from urllib.parse import urlparse
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from resource_utils import ocr_slot
 
 # Set Tesseract CMD path if not in system PATH
 # On Windows, it might be:
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 # Ensure Tesseract is installed and its path is correctly set.
 
+# Size of each decoded piece when streaming large text files
+TEXT_CHUNK_BYTES = 1 << 20  # 1 MB
+
+# --- Path helpers ---
+def _source_path(source):
+    """
+    Returns a filesystem path for `source` if it has one, else None.
+    Accepts plain paths as well as file objects opened from disk. In-memory
+    files (BytesIO, Streamlit's UploadedFile) never count: their `name` is
+    whatever the client sent, so it must not be opened on this machine.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    name = getattr(source, "name", None)
+    if not isinstance(name, str):
+        return None
+    try:
+        opened = os.fstat(source.fileno())
+        return name if os.path.samestat(opened, os.stat(name)) else None
+    except (AttributeError, OSError, ValueError):
+        return None   # no real file descriptor (io.UnsupportedOperation is an OSError)
+
+def _file_type_from_path(path):
+    return path.rsplit(".", 1)[-1].lower() if "." in os.path.basename(path) else ""
+
 # --- File Reading Functions ---
 def read_image(file_obj):
     """Extracts text from an image file using OCR (Tesseract)."""
     try:
         img = Image.open(file_obj)
-        text = pytesseract.image_to_string(img)
+        with ocr_slot():
+            text = pytesseract.image_to_string(img)
         return text
     except pytesseract.TesseractNotFoundError:
         st.error(
@@ -34,14 +69,33 @@ def read_image(file_obj):
         st.error(f"❌ Error reading image: {e}")
         return ""
 
-def read_pdf(file_obj):
-    """Extracts text from a PDF file."""
+def _open_pdf(source):
+    """
+    Opens a PDF without copying it into Python memory when possible.
+    Paths are handed straight to MuPDF, which reads pages on demand; in-memory
+    uploads (BytesIO, Streamlit's UploadedFile) lend MuPDF a memoryview of
+    their buffer, which it reads in place instead of copying into new bytes.
+    """
+    path = _source_path(source)
+    if path:
+        return fitz.open(path, filetype="pdf")
+    if hasattr(source, "getbuffer"):
+        return fitz.open(stream=source.getbuffer(), filetype="pdf")
+    return fitz.open(stream=source.read(), filetype="pdf")
+
+def iter_pdf_pages(source):
+    """Yields the text of a PDF one page at a time."""
+    doc = _open_pdf(source)
     try:
-        # PyMuPDF expects bytes-like object or path
-        doc = fitz.open(stream=file_obj.read(), filetype="pdf")
-        text = "".join(page.get_text() for page in doc)
+        for page in doc:
+            yield page.get_text()
+    finally:
         doc.close()
-        return text
+
+def read_pdf(file_obj):
+    """Extracts text from a PDF file (file object or path)."""
+    try:
+        return "".join(iter_pdf_pages(file_obj))
     except Exception as e:
         st.error(f"❌ Error reading PDF: {e}")
         return ""
@@ -55,35 +109,69 @@ def read_word(file_obj):
         st.error(f"❌ Error reading Word document: {e}")
         return ""
 
+def iter_epub_chapters(source):
+    """Yields the text of each ePub document item (roughly one per chapter)."""
+    book = epub.read_epub(source)
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            soup = BeautifulSoup(item.content, 'html.parser')
+            yield soup.get_text(separator=' ', strip=True) + "\n"
+
 def read_epub(file_obj):
     """Extracts text from an ePub file."""
     try:
-        book = epub.read_epub(file_obj)
-        text = ""
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.content, 'html.parser')
-                text += soup.get_text(separator=' ', strip=True) + "\n"
-        return text
+        return "".join(iter_epub_chapters(file_obj))
     except Exception as e:
         st.error(f"❌ Error reading ePub: {e}")
         return ""
 
+def iter_plain_text(source, chunk_bytes=TEXT_CHUNK_BYTES):
+    """
+    Decodes a plain text file incrementally and yields str chunks.
+    Files on disk are memory-mapped, so only the current chunk is resident;
+    multi-byte characters split across chunk boundaries are handled by the
+    incremental decoder.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    path = _source_path(source)
+
+    if path:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for start in range(0, size, chunk_bytes):
+                    chunk = decoder.decode(mm[start:start + chunk_bytes])
+                    if chunk:
+                        yield chunk
+    else:
+        while True:
+            data = source.read(chunk_bytes)
+            if not data:
+                break
+            chunk = decoder.decode(data)
+            if chunk:
+                yield chunk
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
 def read_plain_text(file_obj):
-    """Extracts text from a plain text file."""
+    """Extracts text from a plain text file (file object or path)."""
     try:
-        # Decode using utf-8, with a fallback to latin-1 if utf-8 fails
-        return file_obj.read().decode("utf-8", errors='ignore')
+        return "".join(iter_plain_text(file_obj))
     except Exception as e:
         st.error(f"❌ Error reading plain text file: {e}")
         return ""
 
-def read_web_page(url):
-    """Fetches and extracts readable text content from a web page."""
+def _fetch_page_soup(url):
+    """Fetches a web page and returns its parsed HTML without scripts and navigation, or None."""
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https") or not parsed.netloc:
         st.error("❌ Invalid URL. Please enter a valid URL starting with http:// or https://")
-        return ""
+        return None
     try:
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
         response = requests.get(url, headers=headers, timeout=10)
@@ -94,36 +182,46 @@ def read_web_page(url):
         # Remove script, style, and navigation elements
         for script_or_style in soup(["script", "style", "nav", "footer", "header"]):
             script_or_style.extract()
-
-        # Get text and clean up whitespace
-        text = soup.get_text(separator=' ', strip=True)
-        return text
+        return soup
 
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 403:
             st.error("🚫 This website doesn't allow extracting data (HTTP 403 Forbidden). Try another website.")
         else:
             st.error(f"🌐 HTTP Error fetching URL: {e}")
-        return ""
+        return None
     except requests.exceptions.ConnectionError as e:
         st.error(f"🌐 Connection Error: Could not connect to the URL '{url}'. Check your internet connection or URL.")
-        return ""
+        return None
     except requests.exceptions.Timeout:
         st.error(f"🌐 Timeout Error: The request to '{url}' took too long. The website might be slow or unresponsive.")
-        return ""
+        return None
     except requests.exceptions.RequestException as e:
         st.error(f"🌐 Error fetching URL: {e}")
-        return ""
+        return None
     except Exception as e:
         st.error(f"❌ An unexpected error occurred while processing the URL: {e}")
+        return None
+
+def read_web_page(url):
+    """Fetches and extracts readable text content from a web page."""
+    soup = _fetch_page_soup(url)
+    if soup is None:
         return ""
+    # Get text and clean up whitespace
+    return soup.get_text(separator=' ', strip=True)
 
 # --- Main Text Reading Dispatcher ---
-def read_text(file_obj=None, file_type=None, url=None):
+def read_text(file_obj=None, file_type=None, url=None, path=None):
     """
     Dispatches to the correct reading function based on input type.
+    `path` may be given instead of `file_obj`; readers then open the file
+    themselves (memory-mapped or on demand) instead of reading it up front.
     Returns the extracted text as a string.
     """
+    if path:
+        file_obj = path
+        file_type = file_type or _file_type_from_path(path)
     if url:
         return read_web_page(url)
     elif file_obj and file_type:
@@ -142,6 +240,329 @@ def read_text(file_obj=None, file_type=None, url=None):
             return ""
     return ""
 
+def iter_text(file_obj=None, file_type=None, path=None):
+    """
+    Streaming counterpart of read_text() for large files: yields the text in
+    pieces (pages for PDF, chapters for ePub, ~1 MB chunks for TXT) so callers that process text
+    incrementally keep memory bounded. Other formats are yielded in one piece.
+    """
+    if path:
+        file_obj = path
+        file_type = file_type or _file_type_from_path(path)
+    if file_type == 'pdf':
+        yield from iter_pdf_pages(file_obj)
+    elif file_type == 'epub':
+        yield from iter_epub_chapters(file_obj)
+    elif file_type == 'txt':
+        yield from iter_plain_text(file_obj)
+    else:
+        text = read_text(file_obj=file_obj, file_type=file_type)
+        if text:
+            yield text
+
+def read_text_with_offsets(file_obj=None, file_type=None, path=None):
+    """
+    Like read_text(), but also returns the character offset at which each
+    page (PDF), chapter (ePub) or chunk (TXT) starts in the returned text.
+    """
+    try:
+        pieces = list(iter_text(file_obj=file_obj, file_type=file_type, path=path))
+    except Exception as e:
+        st.error(f"❌ Error reading file: {e}")
+        return "", []
+    offsets, position = [], 0
+    for piece in pieces:
+        offsets.append(position)
+        position += len(piece)
+    return "".join(pieces), offsets
+
+# --- Structured Extraction ---
+# Block kinds, stored as small integer codes in StructuredDocument.kinds
+BLOCK_KINDS = ("paragraph", "heading", "list_item", "quote", "table_row", "code")
+_KIND_CODE = {kind: code for code, kind in enumerate(BLOCK_KINDS)}
+
+_LIST_MARKER = re.compile(r"^\s*(?:[•·◦▪‣●○■\-–*]|\(?\d{1,3}[.)]|\(?[a-zA-Z][.)])\s+")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+_HTML_BLOCKS = {
+    "h1": ("heading", 1), "h2": ("heading", 2), "h3": ("heading", 3),
+    "h4": ("heading", 4), "h5": ("heading", 5), "h6": ("heading", 6),
+    "p": ("paragraph", 0), "li": ("list_item", 0), "dt": ("paragraph", 0),
+    "dd": ("paragraph", 0), "blockquote": ("quote", 0), "pre": ("code", 0),
+    "tr": ("table_row", 0), "figcaption": ("paragraph", 0), "caption": ("paragraph", 0),
+}
+
+Block = namedtuple("Block", "kind section level start end text")
+
+
+class StructuredDocument:
+    """
+    Compact, array-backed document model.
+    The text is held once as a single string; each block (paragraph, heading,
+    list item, ...) is a row across parallel `array` columns: kind code,
+    section (PDF page or ePub/DOCX chapter), heading level, and start/end
+    character offsets into `text`. A block costs 14 bytes rather than a
+    Python object per field, and slicing `text` gives its contents back.
+    Blocks are separated by a blank line, so paragraph-based consumers
+    (search spans, reading segments) see one paragraph per block.
+    """
+
+    __slots__ = ("text", "kinds", "sections", "levels", "starts", "ends", "_parts", "_length")
+
+    def __init__(self):
+        self.text     = ""
+        self.kinds    = array("B")
+        self.sections = array("I")
+        self.levels   = array("B")
+        self.starts   = array("I")
+        self.ends     = array("I")
+        self._parts   = []
+        self._length  = 0
+
+    # ── building ──────────────────────────────────────────────────────────────
+
+    def add(self, kind, text, section=0, level=0):
+        """Append a block; whitespace is collapsed and empty blocks are dropped."""
+        text = " ".join(text.split())
+        if not text:
+            return
+        if self._parts:
+            self._parts.append("\n\n")
+            self._length += 2
+        self.kinds.append(_KIND_CODE[kind])
+        self.sections.append(section)
+        self.levels.append(min(level, 255))
+        self.starts.append(self._length)
+        self._parts.append(text)
+        self._length += len(text)
+        self.ends.append(self._length)
+
+    def finish(self):
+        """Join the collected pieces into `text`; call once after the last add()."""
+        self.text = "".join(self._parts)
+        self._parts = []
+        return self
+
+    # ── access ────────────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def block(self, i):
+        start, end = self.starts[i], self.ends[i]
+        return Block(BLOCK_KINDS[self.kinds[i]], self.sections[i], self.levels[i], start, end, self.text[start:end])
+
+    def __iter__(self):
+        return (self.block(i) for i in range(len(self)))
+
+    def headings(self):
+        """Yields heading blocks, e.g. to build a table of contents for navigation."""
+        code = _KIND_CODE["heading"]
+        return (self.block(i) for i in range(len(self)) if self.kinds[i] == code)
+
+    @property
+    def offsets(self):
+        """Character offset at which each section starts (same form as read_text_with_offsets)."""
+        return [self.starts[i] for i in range(len(self)) if i == 0 or self.sections[i] != self.sections[i - 1]]
+
+    def sections_spans(self):
+        """Yields (section, start, end) for each page or chapter."""
+        first = 0
+        for i in range(1, len(self) + 1):
+            if i == len(self) or self.sections[i] != self.sections[first]:
+                yield self.sections[first], self.starts[first], self.ends[i - 1]
+                first = i
+
+    def chunks(self, max_words=350):
+        """
+        Yields (start, end) ranges of whole blocks holding at most ~max_words
+        words each. Chunks never cross a section and a heading always starts a
+        new chunk, so per-section summaries and translation can reuse them.
+        Blocks longer than max_words become a chunk of their own.
+        """
+        heading = _KIND_CODE["heading"]
+        chunk_start, words = None, 0
+        for i in range(len(self)):
+            block_words = self.text.count(" ", self.starts[i], self.ends[i]) + 1
+            new_section = i > 0 and self.sections[i] != self.sections[i - 1]
+            if chunk_start is not None and (
+                new_section or self.kinds[i] == heading or words + block_words > max_words
+            ):
+                yield self.starts[chunk_start], self.ends[i - 1]
+                chunk_start, words = None, 0
+            if chunk_start is None:
+                chunk_start = i
+            words += block_words
+        if chunk_start is not None:
+            yield self.starts[chunk_start], self.ends[len(self) - 1]
+
+
+def _add_plain_blocks(doc, text, section=0):
+    """Split unstructured text into paragraphs (blank lines) and list items."""
+    for para in _BLANK_LINES.split(text):
+        lines = [line for line in para.splitlines() if line.strip()]
+        if lines and all(_LIST_MARKER.match(line) for line in lines):
+            for line in lines:
+                doc.add("list_item", line, section)
+        else:
+            doc.add("list_item" if _LIST_MARKER.match(para) and len(lines) == 1 else "paragraph", para, section)
+
+
+def _structure_pdf(source):
+    """
+    Blocks from PyMuPDF's dict output. Headings are blocks set in a larger
+    font than the body text (the most common span size) or fully bold and
+    short; their level follows the font size ranking.
+    """
+    doc = StructuredDocument()
+    pending = []   # (page, text, size, bold) — classified once the body size is known
+    sizes = Counter()
+    pdf = _open_pdf(source)
+    try:
+        for page_number, page in enumerate(pdf):
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:
+                    continue   # image block
+                spans = [span for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                lines = [" ".join(span["text"] for span in line["spans"]) for line in block["lines"]]
+                size = round(max(span["size"] for span in spans), 1)
+                bold = all(span["flags"] & 16 for span in spans)
+                for span in spans:
+                    sizes[round(span["size"], 1)] += len(span["text"])
+                pending.append((page_number, "\n".join(lines), size, bold))
+    finally:
+        pdf.close()
+
+    body = sizes.most_common(1)[0][0] if sizes else 0
+    heading_sizes = sorted({size for _, text, size, _ in pending if size >= body * 1.15}, reverse=True)
+    for page_number, text, size, bold in pending:
+        short = len(text.split()) <= 20
+        if short and size >= body * 1.15:
+            doc.add("heading", text, page_number, heading_sizes.index(size) + 1)
+        elif short and bold:
+            doc.add("heading", text, page_number, len(heading_sizes) + 1)
+        else:
+            _add_plain_blocks(doc, text, page_number)
+    return doc.finish()
+
+
+def _structure_word(source):
+    """Blocks from DOCX paragraph styles and tables, in document order. Each top-level heading starts a new section."""
+    doc = StructuredDocument()
+    word = Document(source)
+    section = 0
+    for child in word.element.body.iterchildren():
+        tag = child.tag.rsplit("}", 1)[-1]
+        if tag == "tbl":
+            for row in Table(child, word).rows:
+                doc.add("table_row", " | ".join(cell.text for cell in row.cells), section)
+            continue
+        if tag != "p":
+            continue
+        paragraph = Paragraph(child, word)
+        style = (paragraph.style.name if paragraph.style is not None else "") or ""
+        if style == "Title" or style.startswith("Heading"):
+            level = int(style.rsplit(" ", 1)[-1]) if style[-1:].isdigit() else 1
+            if level == 1 and len(doc):
+                section += 1
+            doc.add("heading", paragraph.text, section, level)
+        elif style.startswith("List"):
+            doc.add("list_item", paragraph.text, section)
+        elif "Quote" in style:
+            doc.add("quote", paragraph.text, section)
+        else:
+            doc.add("paragraph", paragraph.text, section)
+    return doc.finish()
+
+
+def _add_html_blocks(doc, soup, section=0):
+    """Blocks from block-level HTML tags. Text outside any block tag is kept as paragraphs."""
+    found = False
+    for tag in soup.find_all(list(_HTML_BLOCKS) + ["div"]):
+        if tag.find_parent(list(_HTML_BLOCKS)) is not None:
+            continue   # already covered by an enclosing block (e.g. <p> inside <li>)
+        if tag.name == "div":
+            if tag.find(list(_HTML_BLOCKS) + ["div"]) is not None:
+                continue   # layout wrapper; its children are visited themselves
+            kind, level = "paragraph", 0
+        else:
+            kind, level = _HTML_BLOCKS[tag.name]
+        separator = " | " if kind == "table_row" else " "
+        doc.add(kind, tag.get_text(separator=separator, strip=True), section, level)
+        found = True
+    if not found:
+        _add_plain_blocks(doc, soup.get_text(separator="\n", strip=True), section)
+
+
+def _structure_epub(source):
+    """Blocks from each ePub document item; every item is its own section (chapter)."""
+    doc = StructuredDocument()
+    book = epub.read_epub(source)
+    chapter = 0
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            _add_html_blocks(doc, BeautifulSoup(item.content, 'html.parser'), chapter)
+            chapter += 1
+    return doc.finish()
+
+
+def _structure_plain(source):
+    """Paragraph blocks from a text file, streamed so only one chunk and the blocks are held."""
+    doc = StructuredDocument()
+    carry = ""
+    for chunk in iter_plain_text(source):
+        text = carry + chunk
+        cut = text.rfind("\n\n")
+        if cut < 0:
+            carry = text
+            continue
+        _add_plain_blocks(doc, text[:cut])
+        carry = text[cut:]
+    _add_plain_blocks(doc, carry)
+    return doc.finish()
+
+
+def read_structured(file_obj=None, file_type=None, url=None, path=None):
+    """
+    Structured counterpart of read_text(): returns a StructuredDocument whose
+    blocks carry their type (heading, paragraph, list item, ...), page or
+    chapter, and offsets into the extracted text. Headings come from font
+    sizes (PDF), paragraph styles (DOCX) or tags (ePub, web pages).
+    Returns an empty document if the input cannot be read.
+    """
+    if path:
+        file_obj = path
+        file_type = file_type or _file_type_from_path(path)
+    try:
+        if url:
+            doc = StructuredDocument()
+            soup = _fetch_page_soup(url)
+            if soup is not None:
+                _add_html_blocks(doc, soup)
+            return doc.finish()
+        if not (file_obj and file_type):
+            return StructuredDocument().finish()
+        if file_type == 'pdf':
+            return _structure_pdf(file_obj)
+        elif file_type == 'docx':
+            return _structure_word(file_obj)
+        elif file_type == 'epub':
+            return _structure_epub(file_obj)
+        elif file_type == 'txt':
+            return _structure_plain(file_obj)
+        elif file_type in ['jpg', 'jpeg', 'png']:
+            doc = StructuredDocument()
+            _add_plain_blocks(doc, read_image(file_obj))
+            return doc.finish()
+        else:
+            st.error(f"Unsupported file format: {file_type}")
+            return StructuredDocument().finish()
+    except Exception as e:
+        st.error(f"❌ Error reading file structure: {e}")
+        return StructuredDocument().finish()
+
 def is_internet_available():
     """Checks if there's an active internet connection."""
     try:
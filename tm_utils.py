@@ -0,0 +1,240 @@
+"""
+Sentence-level translation memory.
+
+Policies, manuals and newsletters repeat a lot of boilerplate between
+versions. The memory stores every translated sentence keyed by a normalised
+form of its source, so repeated sentences are reused instead of being sent
+through MarianMT again:
+
+- Exact matches ignore case and spacing only.
+- Near-duplicates are found with MinHash over character 3-grams (numbers
+  masked), banded for locality-sensitive lookup, and confirmed with an
+  edit-similarity check. A near-duplicate is only reused when it is very
+  close (FUZZY_THRESHOLD) and its content words are the same: the sentences
+  may differ in numbers, spacing, punctuation and function words ("the",
+  "a", "of", ...), never in a word that carries meaning, and never by a
+  negation. Every number of the stored sentence must also be located exactly
+  once in its translation and swapped for the new value; otherwise the
+  lookup is a miss and the sentence is translated again.
+
+Segments live in the document store's SQLite database but are not tied to a
+document, so they survive document eviction; compact() keeps the most
+recently used MAX_SEGMENTS.
+"""
+
+import difflib
+import hashlib
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+FUZZY_THRESHOLD = float(os.environ.get("TAPVISION_TM_FUZZY", "0.95"))   # 1.0 disables fuzzy reuse
+MAX_SEGMENTS    = 200_000
+
+_NUM_HASHES = 16
+_BANDS      = 4
+_ROWS       = _NUM_HASHES // _BANDS
+_PRIME      = (1 << 61) - 1
+_rng        = np.random.default_rng(1234)   # fixed seed: signatures must be stable across runs
+_HASH_A     = _rng.integers(1, 1 << 31, size=_NUM_HASHES, dtype=np.uint64)
+_HASH_B     = _rng.integers(0, 1 << 31, size=_NUM_HASHES, dtype=np.uint64)
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_TOKEN  = re.compile(r"\w+(?:'\w+)?")
+
+# Words whose addition or removal flips a sentence's meaning (en, fr, de, es, it, pt, nl)
+_NEGATIONS = frozenset(
+    "not no never none nor neither nobody nothing nowhere cannot without "
+    "ne pas jamais aucun aucune personne rien sans "
+    "nicht kein keine keinen keiner nie niemals niemand nichts ohne "
+    "nunca ningún ninguna ninguno nada nadie sin "
+    "non mai nessuno nessuna niente nulla senza "
+    "não nenhum nenhuma ninguém nada sem "
+    "niet geen nooit niemand niets zonder".split()
+)
+
+# Function words (en, fr, de, es, it, pt, nl) a near-duplicate may differ in;
+# any other word difference means the sentence is translated afresh
+_STOPWORDS = frozenset(
+    "a an the of to in on at by for from with and or as is are was were be been it its this that "
+    "le la les l un une des du de d au aux et ou en à est sont "
+    "der die das den dem des ein eine einen einem einer und oder zu im am ist sind "
+    "el los las un una unos unas del al y o es son "
+    "il lo gli i uno della di e è sono "
+    "o os as um uma do da dos das no na e é são "
+    "de het een en of van in op te is zijn".split()
+) - _NEGATIONS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm_segments (
+    segment_id  INTEGER PRIMARY KEY,
+    key         TEXT NOT NULL,
+    lang        TEXT NOT NULL,
+    preset      TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    translated  TEXT NOT NULL,
+    used_at     REAL NOT NULL,
+    UNIQUE (key, lang, preset)
+);
+CREATE TABLE IF NOT EXISTS tm_bands (
+    band        TEXT NOT NULL,
+    segment_id  INTEGER NOT NULL REFERENCES tm_segments(segment_id) ON DELETE CASCADE,
+    PRIMARY KEY (band, segment_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tm_bands_segment ON tm_bands(segment_id);
+"""
+
+
+# --- Normalisation and hashing ---
+def normalize(sentence):
+    """Lower-case and collapse whitespace; the exact-match key."""
+    return " ".join(sentence.lower().split())
+
+
+def _masked(normalized):
+    """Numbers masked, so sentences differing only in figures are near-duplicates."""
+    return _NUMBER.sub("0", normalized)
+
+
+def _key(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _shingles(normalized, k=3):
+    if len(normalized) <= k:
+        return {normalized}
+    return {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+
+def minhash_bands(normalized):
+    """MinHash signature of the sentence's character 3-grams, as LSH band keys."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in _shingles(normalized)), dtype=np.uint64
+    )
+    # (a * x + b) mod p for every hash function at once, then the row minima
+    signature = ((np.outer(_HASH_A, hashes) + _HASH_B[:, None]) % _PRIME).min(axis=1)
+    return [
+        f"{b}:" + "-".join(str(v) for v in signature[b * _ROWS:(b + 1) * _ROWS])
+        for b in range(_BANDS)
+    ]
+
+
+def _transfer_numbers(old_source, new_source, translation):
+    """
+    Put the new sentence's numbers into the stored translation of a similar
+    sentence. Returns None (not reusable) unless every number of the stored
+    sentence is distinct and appears exactly once among the translation's
+    numbers, so each one is replaced exactly once. Spelled-out, reformatted
+    or repeated numbers therefore cause a miss instead of a wrong figure.
+    """
+    old_numbers = _NUMBER.findall(old_source)
+    new_numbers = _NUMBER.findall(new_source)
+    if old_numbers == new_numbers:
+        return translation
+    if len(old_numbers) != len(new_numbers) or len(set(old_numbers)) != len(old_numbers):
+        return None
+    target_numbers = _NUMBER.findall(translation)
+    if any(target_numbers.count(number) != 1 for number in old_numbers):
+        return None
+    mapping = dict(zip(old_numbers, new_numbers))
+    return _NUMBER.sub(lambda m: mapping.get(m.group(), m.group()), translation)
+
+
+def _content_words(normalized):
+    """The sentence's tokens other than function words, numbers masked."""
+    return [t for t in _TOKEN.findall(_masked(normalized)) if t not in _STOPWORDS]
+
+
+def _negation_changed(a, b):
+    """True if a negation word occurs a different number of times in the two sentences."""
+    tokens_a, tokens_b = _TOKEN.findall(a), _TOKEN.findall(b)
+    return any(
+        tokens_a.count(word) != tokens_b.count(word)
+        for word in _NEGATIONS.intersection(tokens_a + tokens_b)
+    ) or sum(t.endswith("n't") for t in tokens_a) != sum(t.endswith("n't") for t in tokens_b)
+
+
+# --- Memory ---
+class TranslationMemory:
+    """Persistent sentence → translation memory with exact and fuzzy lookup."""
+
+    def __init__(self, store, fuzzy_threshold=FUZZY_THRESHOLD):
+        self.store = store
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = {"exact": 0, "fuzzy": 0, "miss": 0}
+        with self.store.transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    def lookup(self, sentence, lang, preset):
+        """Returns a reusable translation for the sentence, or None."""
+        normalized = normalize(sentence)
+        now = time.time()
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT segment_id, source, translated FROM tm_segments WHERE key = ? AND lang = ? AND preset = ?",
+                (_key(normalized), lang, preset),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE tm_segments SET used_at = ? WHERE segment_id = ?", (now, row[0]))
+                self.hits["exact"] += 1
+                return row[2]
+
+            if self.fuzzy_threshold >= 1.0:
+                self.hits["miss"] += 1
+                return None
+
+            masked = _masked(normalized)
+            bands = minhash_bands(masked)
+            candidates = conn.execute(
+                f"SELECT DISTINCT s.segment_id, s.source, s.translated FROM tm_bands b "
+                f"JOIN tm_segments s ON s.segment_id = b.segment_id "
+                f"WHERE b.band IN ({','.join('?' * len(bands))}) AND s.lang = ? AND s.preset = ? LIMIT 20",
+                (*bands, lang, preset),
+            ).fetchall()
+            best, best_ratio = None, 0.0
+            for segment_id, source, translated in candidates:
+                ratio = difflib.SequenceMatcher(None, _masked(normalize(source)), masked).ratio()
+                if ratio > best_ratio:
+                    best, best_ratio = (segment_id, source, translated), ratio
+            if best is not None and best_ratio >= self.fuzzy_threshold \
+                    and _content_words(normalize(best[1])) == _content_words(normalized) \
+                    and not _negation_changed(normalize(best[1]), normalized):
+                reused = _transfer_numbers(best[1], sentence, best[2])
+                if reused is not None:
+                    conn.execute("UPDATE tm_segments SET used_at = ? WHERE segment_id = ?", (now, best[0]))
+                    self.hits["fuzzy"] += 1
+                    return reused
+
+        self.hits["miss"] += 1
+        return None
+
+    def add(self, sentence, lang, preset, translated):
+        """Remember a model translation; an existing entry for the same key is kept."""
+        normalized = normalize(sentence)
+        with self.store.transaction() as conn:
+            existing = conn.execute(
+                "SELECT segment_id FROM tm_segments WHERE key = ? AND lang = ? AND preset = ?",
+                (_key(normalized), lang, preset),
+            ).fetchone()
+            if existing is not None:
+                return
+            segment_id = conn.execute(
+                "INSERT INTO tm_segments (key, lang, preset, source, translated, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (_key(normalized), lang, preset, sentence, translated, time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO tm_bands (band, segment_id) VALUES (?, ?)",
+                [(band, segment_id) for band in minhash_bands(_masked(normalized))],
+            )
+
+    def compact(self, max_segments=MAX_SEGMENTS):
+        """Drop the least recently used segments beyond max_segments."""
+        with self.store.transaction() as conn:
+            return conn.execute(
+                "DELETE FROM tm_segments WHERE segment_id NOT IN "
+                "(SELECT segment_id FROM tm_segments ORDER BY used_at DESC LIMIT ?)",
+                (max_segments,),
+            ).rowcount
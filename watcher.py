@@ -14,18 +14,34 @@ HOW IT WORKS
 4. TapVision automatically:
       • Detects the file
       • Extracts all text (OCR for images)
-      • Summarizes the content
-      • Reads the summary aloud
+      • Reads an instant extractive preview aloud
+      • Summarizes the content in the background and offers the
+        detailed summary when it is ready
       • Listens for your follow-up voice commands
 5. Processed files are moved to ~/TapVision/processed/ so the inbox
-   stays clean.
+   stays clean. Files that cannot be read are retried a few times and
+   then moved to ~/TapVision/errors/. Every file is recorded in a job
+   queue on disk, so anything still waiting when TapVision stops is
+   picked up again on the next start.
 
 VOICE COMMANDS (after a file is read)
 --------------------------------------
-  "full text"          — Read the entire document aloud
+  "full text"          — Read the entire document aloud, paragraph by
+                         paragraph; say "next", "back", "pause" or
+                         "resume" in the short pause after each part
+                         (or at any moment after a wake word)
+  "resume"             — Continue reading where you left off, even
+                         after TapVision was restarted
   "translate to Hindi" — Translate summary to Hindi, French, German,
   "translate to French"  Spanish, or English, then read it
   "repeat"             — Hear the summary again
+  "quick summary"      — Fast, greedy summary from a smaller model
+  "detailed summary"   — Slower, beam-search summary from the full model
+  "find refunds"       — Read the passage that best matches a phrase,
+                         in this document or any earlier one
+  "contents"           — List the document's headings
+  "go to Pricing"      — Start reading at a heading, by name or by
+  "go to section 3"      its number in the contents
   "done" / "stop"      — Return to waiting for the next file
 
 REQUIREMENTS
@@ -37,13 +53,20 @@ REQUIREMENTS
 import os
 import sys
 import time
+import queue
+import difflib
 import threading
 
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-from text_utils import read_text, is_internet_available
-from speech_utils import speak_now, recognize_speech_from_mic
+from text_utils import read_structured, is_internet_available
+from speech_utils import speak_now, recognize_speech_from_mic, BackgroundListener
+from resource_utils import apply_resource_budget
+from store_utils import DocumentStore, file_sha256
+from search_utils import SearchIndex
+from reading_utils import ReadingSession, ReadingPositions, document_headings
+from inbox_utils import InboxMonitor
+from queue_utils import JobQueue
+from tm_utils import TranslationMemory
+from profile_utils import PROFILE_ENABLED, DocumentProfiler
 
 # ── Folders ──────────────────────────────────────────────────────────────────
 INBOX_FOLDER     = os.path.expanduser("~/TapVision/inbox")
@@ -52,6 +75,9 @@ ERROR_FOLDER     = os.path.expanduser("~/TapVision/errors")
 
 SUPPORTED_EXTENSIONS = {"pdf", "docx", "epub", "txt", "jpg", "jpeg", "png"}
 
+# Speed/quality preset for the automatic summary (fast, balanced, best)
+SUMMARY_PRESET = os.environ.get("TAPVISION_PRESET", "best")
+
 LANGUAGE_MAP = {
     "hindi":   "hi",
     "french":  "fr",
@@ -62,36 +88,6 @@ LANGUAGE_MAP = {
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def _wait_until_stable(filepath, poll_interval=0.4, stable_for=1.0, timeout=30):
-    """
-    Wait until the file size stops changing (i.e., the copy/write is done).
-    Returns True if the file stabilised, False if it timed out.
-    """
-    deadline = time.time() + timeout
-    last_size = -1
-    stable_since = None
-
-    while time.time() < deadline:
-        try:
-            size = os.path.getsize(filepath)
-        except OSError:
-            time.sleep(poll_interval)
-            continue
-
-        if size == last_size:
-            if stable_since is None:
-                stable_since = time.time()
-            elif time.time() - stable_since >= stable_for:
-                return True
-        else:
-            last_size = size
-            stable_since = None
-
-        time.sleep(poll_interval)
-
-    return False
-
-
 def _move_file(src, dest_folder):
     os.makedirs(dest_folder, exist_ok=True)
     base = os.path.basename(src)
@@ -106,172 +102,575 @@ def _move_file(src, dest_folder):
         pass  # Non-fatal; leave file in place
 
 
+class _BackgroundSummary:
+    """
+    The (slow) abstractive summary of one document. It is run by the
+    handler's single refinement worker once the document is presented;
+    a cancelled summary is skipped, or its result ignored if already running.
+    """
+
+    def __init__(self, fn):
+        self.result    = None
+        self.error     = None
+        self.cancelled = False
+        self._fn       = fn
+        self._done     = threading.Event()
+
+    def run(self):
+        try:
+            if not self.cancelled:
+                result = self._fn()
+                if not self.cancelled:
+                    self.result = result
+        except Exception as e:
+            self.error = e
+            print(f"[TapVision] Background summarization failed: {e}")
+        finally:
+            self._done.set()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def succeeded(self, source_text):
+        # summarize_text() returns its input unchanged when it fails
+        return bool(self.result) and self.result != source_text
+
+
+class _PreparedDocument:
+    """Everything _prepare() learned about a file, ready to be spoken."""
+
+    def __init__(self, filename):
+        self.filename   = filename
+        self.error      = None
+        self.doc_hash   = None
+        self.text       = ""
+        self.headings   = []      # (title, level, offset) for heading navigation
+        self.summary    = ""
+        self.refined    = None
+        self.from_store = False
+        self.retryable  = False   # transient failure (e.g. file still locked) worth retrying
+
+
 # ── Event Handler ─────────────────────────────────────────────────────────────
 
-class TapVisionHandler(FileSystemEventHandler):
+class TapVisionHandler:
     """Processes every new file that lands in the inbox folder."""
 
-    def __init__(self, summarizer, translation_models, translation_tokenizers):
+    def __init__(self, summarizer, translation_models, translation_tokenizers,
+                 store=None, search_index=None, positions=None, listener=None, jobs=None,
+                 memory=None):
         self.summarizer             = summarizer
         self.translation_models     = translation_models
         self.translation_tokenizers = translation_tokenizers
-        self._lock                  = threading.Lock()  # one file at a time
+        self.store                  = store
+        self.search_index           = search_index
+        self.positions              = positions
+        self.listener               = listener
+        self.jobs                   = jobs if jobs is not None else JobQueue(":memory:")
+        self.memory                 = memory
+        self._lock                  = threading.Lock()  # one conversation at a time
+        # Prepared documents waiting to be spoken; bounded so extraction only
+        # runs a couple of files ahead of the conversation.
+        self._ready                 = queue.Queue(maxsize=2)
+        # Abstractive summaries, run one at a time to stay within the CPU budget
+        self._refinements           = queue.Queue()
+        self._summarizers           = {}   # model name → pipeline; presets may share a model
+
+    def _get_summarizer(self, preset):
+        """Load the summarizer for a preset on first use (e.g. DistilBART for "fast")."""
+        from nlp_utils import get_preset, load_summarizer
+        name = get_preset(preset)["summarizer_model"]
+        if name not in self._summarizers:
+            if name == get_preset(SUMMARY_PRESET)["summarizer_model"]:
+                self._summarizers[name] = self.summarizer
+            else:
+                self._summarizers[name] = load_summarizer(preset)
+        return self._summarizers[name]
 
-    # ── watchdog callback ─────────────────────────────────────────────────────
+    # ── inbox callbacks ───────────────────────────────────────────────────────
 
-    def on_created(self, event):
-        if event.is_directory:
-            return
-        # Run processing in a thread so the Observer loop stays unblocked
-        t = threading.Thread(target=self._handle, args=(event.src_path,), daemon=True)
-        t.start()
+    def submit(self, filepath):
+        """Called by the InboxMonitor once a file has been completely written."""
+        if self.jobs.enqueue(filepath) is not None:
+            print(f"[TapVision] Queued: {os.path.basename(filepath)}")
 
-    # ── main processing flow ──────────────────────────────────────────────────
+    def skip_duplicate(self, filepath):
+        """Identical content was just received; archive the copy without reading it again."""
+        _move_file(filepath, PROCESSED_FOLDER)
+        # Spoken between conversations, without holding up the inbox monitor
+        notice = f"Already read {os.path.basename(filepath)}; skipped."
+        threading.Thread(target=self._announce, args=(notice,), daemon=True).start()
 
-    def _handle(self, filepath):
+    def _announce(self, message):
         with self._lock:
-            self._process(filepath)
+            speak_now(message)
+
+    # ── main processing flow ──────────────────────────────────────────────────
 
-    def _process(self, filepath):
+    def start(self):
+        """
+        Start the workers: one takes jobs off the durable queue and prepares
+        them, one speaks prepared documents one at a time, and one runs the
+        detailed summary of the document being presented. Extraction of the
+        next file therefore runs while the user is still talking to TapVision
+        about the previous one.
+        """
+        for target in (self._prepare_loop, self._present_loop, self._refine_loop):
+            threading.Thread(target=target, daemon=True).start()
+        return self
+
+    def _prepare_loop(self):
+        while True:
+            job = self.jobs.claim()
+            profiler = None
+            if PROFILE_ENABLED:
+                # Spans the preparing, presenting and refinement threads (the idle main
+                # loop is left out); stopped on another thread, so no torch operator table.
+                # Every thread is sampled, so the next file is not prepared until the
+                # previous profile has ended: profiling turns off the pipelining.
+                profiler = DocumentProfiler(os.path.basename(job.path), ignore_threads=("MainThread",),
+                                            torch_ops=False).start(wait=True)
+            try:
+                doc = self._prepare(job.path)
+            except Exception as e:
+                doc = _PreparedDocument(os.path.basename(job.path))
+                doc.error = f"Sorry, something went wrong while reading {doc.filename}. {e}"
+                doc.retryable = True
+
+            if doc.error:
+                if self.jobs.fail(job, doc.error, retryable=doc.retryable):
+                    print(f"[TapVision] Will retry {doc.filename}: {doc.error}")
+                    if profiler is not None:
+                        profiler.stop()
+                    continue
+                _move_file(job.path, ERROR_FOLDER)
+            else:
+                self.jobs.mark_ready(job.id)
+            self._ready.put((job, doc, profiler))
+
+    def _present_loop(self):
+        while True:
+            job, doc, profiler = self._ready.get()
+            failure = None
+            with self._lock:
+                try:
+                    self._present(doc, profiler)
+                except Exception as e:
+                    failure = e
+                    print(f"[TapVision] Error while presenting {doc.filename}: {e}")
+            if doc.error:
+                pass   # already failed (and archived) by the prepare loop
+            elif failure is not None:
+                # Never spoken to the user: keep the file and try again, like a failed extraction
+                retrying = self.jobs.fail(job, f"Presenting failed: {failure}", retryable=True)
+                if not retrying:
+                    _move_file(job.path, ERROR_FOLDER)
+                try:
+                    speak_now(f"Sorry, something went wrong while reading {doc.filename}. "
+                              + ("I will try again shortly." if retrying else "I moved it to the errors folder."))
+                except Exception:
+                    pass
+            else:
+                _move_file(job.path, PROCESSED_FOLDER)
+                self.jobs.complete(job.id)
+            if profiler is not None:
+                profiler.stop()   # no-op unless presenting failed before the profile ended
+
+    def _refine_loop(self):
+        while True:
+            refined, profiler = self._refinements.get()
+            refined.run()
+            if profiler is not None:
+                profiler.stop()   # the document's profile ends with its detailed summary
+
+    def _prepare(self, filepath):
+        """
+        Extract, store, index and start summarising a file without speaking.
+        Returns a _PreparedDocument; failures are carried in its `error`.
+        """
         filename = os.path.basename(filepath)
         ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        doc = _PreparedDocument(filename)
 
         # ── 1. Validate extension ─────────────────────────────────────────────
         if ext not in SUPPORTED_EXTENSIONS:
-            speak_now(
+            doc.error = (
                 f"Skipping {filename}. "
                 f"Supported formats are PDF, Word, EPUB, plain text, and images."
             )
-            return
+            return doc
 
-        # ── 2. Wait for the file to finish writing ────────────────────────────
-        speak_now(f"New file detected: {filename}. Please wait while I prepare it.")
-        if not _wait_until_stable(filepath):
-            speak_now("The file took too long to appear. Please try again.")
-            return
+        print(f"[TapVision] New file detected: {filename}")
 
-        # ── 3. Extract text ───────────────────────────────────────────────────
-        speak_now("Extracting text now.")
+        # ── 2. Extract text (or recall it from the document store) ───────────
         try:
-            with open(filepath, "rb") as fobj:
-                text = read_text(file_obj=fobj, file_type=ext)
-        except Exception as e:
-            speak_now(f"Sorry, I could not open the file. {e}")
-            _move_file(filepath, ERROR_FOLDER)
-            return
+            doc.doc_hash = file_sha256(filepath)
+        except OSError as e:
+            doc.error = f"Sorry, I could not open {filename}. {e}"
+            doc.retryable = True
+            return doc
+
+        stored = self.store.get(doc.doc_hash) if self.store else None
+        if stored is not None:
+            doc.from_store = True
+            doc.text, offsets = stored.text, stored.offsets
+            doc.headings = self.positions.headings(doc.doc_hash) if self.positions else []
+        else:
+            try:
+                structure = read_structured(path=filepath, file_type=ext)
+                doc.text, offsets = structure.text, structure.offsets
+                doc.headings = document_headings(structure)
+            except Exception as e:
+                doc.error = f"Sorry, I could not open {filename}. {e}"
+                doc.retryable = True
+                return doc
 
-        if not text or not text.strip():
-            speak_now(
-                "I could not find any readable text in this file. "
+        if not doc.text or not doc.text.strip():
+            doc.error = (
+                f"I could not find any readable text in {filename}. "
                 "If it is a scanned image, make sure Tesseract OCR is installed."
             )
-            _move_file(filepath, ERROR_FOLDER)
+            return doc
+
+        if stored is None and self.store:
+            self.store.put(doc.doc_hash, doc.text, offsets, filename=filename, file_type=ext)
+            if self.positions:
+                self.positions.save_headings(doc.doc_hash, doc.headings)
+        if self.search_index:
+            self.search_index.index_document(doc.doc_hash, doc.text, offsets)
+
+        # ── 3. Summarise ──────────────────────────────────────────────────────
+        from nlp_utils import extractive_summary   # imported here to keep startup fast
+
+        cached_summary = self.store.get_summary(doc.doc_hash, SUMMARY_PRESET) if self.store else None
+        if cached_summary:
+            doc.summary = cached_summary
+        elif len(doc.text.split()) >= 50:
+            # An instant extractive preview is spoken first; the abstractive
+            # summary runs in the background and is offered once it is ready.
+            doc.summary = extractive_summary(doc.text)
+            doc_hash, text = doc.doc_hash, doc.text
+            doc.refined = _BackgroundSummary(lambda: self._summarize(doc_hash, text, SUMMARY_PRESET))
+        else:
+            doc.summary = doc.text
+
+        return doc
+
+    def _present(self, doc, profiler=None):
+        """
+        Speak the results for a prepared document and open the voice menu.
+        The document's profile (if any) ends once its summaries are done, so
+        time spent waiting in the voice menu is not counted.
+        """
+        if doc.error:
+            speak_now(doc.error)
+            if profiler is not None:
+                profiler.stop()
             return
 
-        word_count = len(text.split())
-        speak_now(f"Extraction complete. The document has approximately {word_count} words.")
+        speak_now(f"New file: {doc.filename}.")
+        if doc.from_store:
+            speak_now("I have read this file before, so I will use what I already know.")
 
-        # ── 4. Summarise ──────────────────────────────────────────────────────
-        from nlp_utils import summarize_text   # imported here to keep startup fast
+        word_count = len(doc.text.split())
+        speak_now(f"Extraction complete. The document has approximately {word_count} words.")
 
-        if word_count >= 50:
-            speak_now("Generating a summary. This may take a moment.")
-            try:
-                summary = summarize_text(text, self.summarizer)
-            except Exception as e:
-                speak_now(f"Summarization failed: {e}. I will read the first part of the document instead.")
-                summary = " ".join(text.split()[:120])
+        # ── 4. Read the summary (or preview) aloud ────────────────────────────
+        if doc.refined is not None:
+            self._refinements.put((doc.refined, profiler))   # runs while the preview is spoken
+            speak_now(f"Here is a quick preview: {doc.summary}")
+            speak_now("I am preparing a detailed summary and will tell you when it is ready.")
         else:
-            summary = text
-            speak_now("The document is short, so I will read it directly.")
+            if word_count < 50:
+                speak_now("The document is short, so I will read it directly.")
+            speak_now(f"Here is the summary: {doc.summary}")
+
+        if doc.refined is None and profiler is not None:
+            profiler.stop()
+
+        # ── 5. Voice follow-up menu ───────────────────────────────────────────
+        self._voice_menu(doc.text, doc.summary, doc.refined, doc.doc_hash, doc.headings)
+
+    # ── cached NLP helpers ────────────────────────────────────────────────────
+
+    def _summarize(self, doc_hash, text, preset):
+        """summarize_text() with the result remembered in the document store."""
+        from nlp_utils import summarize_text, translate_any
+        # BART is English-only: other languages are translated to English first
+        source = translate_any(text, "en", self.translation_models, self.translation_tokenizers,
+                               preset=preset, memory=self.memory)
+        summary = summarize_text(source, self._get_summarizer(preset), preset=preset)
+        if summary == source:
+            return text   # too short or failed; keep the "unchanged input" convention
+        if self.store and summary and summary != text:
+            self.store.put_summary(doc_hash, preset, summary)
+        return summary
+
+    def _translate(self, doc_hash, text, target_code):
+        """translate_any() with the result remembered in the document store."""
+        from nlp_utils import translate_any
+        if self.store:
+            cached = self.store.get_translation(text, target_code, SUMMARY_PRESET)
+            if cached:
+                return cached
+        translated = translate_any(
+            text, target_code,
+            self.translation_models,
+            self.translation_tokenizers,
+            preset=SUMMARY_PRESET,
+            memory=self.memory,
+        )
+        if self.store and translated and translated != text:
+            self.store.put_translation(text, target_code, SUMMARY_PRESET, translated, doc_hash)
+        return translated
+
+    def _listen(self, timeout_seconds=8):
+        """Next voice command, from the background listener when one is running."""
+        if self.listener is not None and self.listener.is_running():
+            return self.listener.get_command(timeout=timeout_seconds)
+        return recognize_speech_from_mic(
+            prompt="Listening for your command...",
+            timeout_seconds=timeout_seconds,
+        )
 
-        # ── 5. Read summary aloud ─────────────────────────────────────────────
-        speak_now(f"Here is the summary: {summary}")
+    def _find(self, command, doc_hash):
+        """Speak the passage that best matches "find <phrase>"."""
+        phrase = ""
+        for prefix in ("search for ", "look for ", "search ", "find "):
+            if command.startswith(prefix):
+                phrase = command[len(prefix):].strip()
+                break
+        if not phrase or not self.search_index:
+            speak_now("Say find, followed by what you are looking for.")
+            return
 
-        # ── 6. Archive the file ───────────────────────────────────────────────
-        _move_file(filepath, PROCESSED_FOLDER)
+        hits = self.search_index.search(phrase, limit=1, doc_hash=doc_hash)
+        if hits:
+            speak_now(f"Here is the part about {phrase}: {hits[0].snippet}")
+            return
+        hits = self.search_index.search(phrase, limit=1)
+        if hits:
+            speak_now(
+                f"This document does not mention {phrase}, "
+                f"but {hits[0].filename or 'an earlier document'} does: {hits[0].snippet}"
+            )
+        else:
+            speak_now(f"I could not find anything about {phrase}.")
 
-        # ── 7. Voice follow-up menu ───────────────────────────────────────────
-        self._voice_menu(text, summary)
+    def _speak_contents(self, headings):
+        """Read the headings out as a numbered table of contents."""
+        if not headings:
+            speak_now("This document has no headings. Say full text to hear everything.")
+            return
+        entries = "; ".join(f"{n}, {title}" for n, (title, _, _) in enumerate(headings, 1))
+        speak_now(f"The document has {len(headings)} sections: {entries}. "
+                  "Say go to, followed by a section name or number.")
+
+    @staticmethod
+    def _match_heading(command, headings):
+        """The heading named in "go to <title>" / "section <n>", or None."""
+        target = command
+        for prefix in ("go to section ", "jump to section ", "go to ", "jump to ", "section "):
+            if command.startswith(prefix):
+                target = command[len(prefix):].strip()
+                break
+        if target.isdigit():
+            n = int(target)
+            return headings[n - 1] if 1 <= n <= len(headings) else None
+        titles = [title.lower() for title, _, _ in headings]
+        for i, title in enumerate(titles):
+            if target and target in title:
+                return headings[i]
+        close = difflib.get_close_matches(target, titles, n=1, cutoff=0.6)
+        return headings[titles.index(close[0])] if close else None
 
     # ── interactive voice menu ─────────────────────────────────────────────────
 
-    def _voice_menu(self, full_text, summary):
-        from nlp_utils import translate_text   # lazy import
-
+    def _voice_menu(self, full_text, summary, refined=None, doc_hash=None, headings=()):
         speak_now(
             "What would you like to do? "
             "Say: full text to hear everything, "
             "translate to followed by a language name, "
             "repeat to hear the summary again, "
-            "or done to wait for the next file."
+            "quick summary or detailed summary, "
+            "find followed by a topic, "
+            + ("contents to hear the section headings, " if headings else "")
+            + "or done to wait for the next file."
         )
 
-        consecutive_misses = 0
+        if self.listener is not None:
+            self.listener.clear()   # ignore anything said before the menu opened
 
-        while consecutive_misses < 3:
-            command = recognize_speech_from_mic(
-                prompt="Listening for your command...",
-                timeout_seconds=8,
+        session = ReadingSession(doc_hash, full_text, positions=self.positions)
+        saved = session.saved_position
+        if saved > 0:
+            speak_now(
+                f"Last time you stopped at part {saved + 1} of {len(session.segments)}. "
+                "Say resume to continue from there."
             )
 
-            if not command:
-                consecutive_misses += 1
-                if consecutive_misses < 3:
-                    speak_now("I did not catch that. Please try again.")
-                continue
-
-            consecutive_misses = 0
-            command = command.lower().strip()
-
-            if any(k in command for k in ("full text", "read all", "read everything", "everything")):
-                speak_now("Reading the full document now.")
-                speak_now(full_text)
-
-            elif "repeat" in command or "again" in command or "summary" in command:
-                speak_now(summary)
-
-            elif "translate" in command:
-                target_code = None
-                for lang_name, code in LANGUAGE_MAP.items():
-                    if lang_name in command:
-                        target_code = code
-                        lang_display = lang_name.capitalize()
-                        break
-
-                if target_code and target_code != "en":
-                    speak_now(f"Translating to {lang_display}. Please wait.")
-                    try:
-                        translated = translate_text(
-                            summary, target_code,
-                            self.translation_models,
-                            self.translation_tokenizers,
-                        )
-                        speak_now(translated, lang=target_code)
-                    except Exception as e:
-                        speak_now(f"Translation failed. {e}")
-                elif target_code == "en":
-                    speak_now("The content is already in English.")
-                else:
+        consecutive_misses = 0
+        refined_offered = False
+
+        try:
+            while consecutive_misses < 3:
+                reading = session.is_playing()
+
+                if refined is not None and not refined_offered and refined.ready() and not reading:
+                    refined_offered = True
+                    if refined.succeeded(full_text):
+                        summary = refined.result
+                        speak_now("The detailed summary is ready. Say repeat to hear it.")
+                    else:
+                        speak_now("Sorry, I could not prepare the detailed summary. "
+                                  "Say quick summary or full text instead.")
+
+                command = self._listen(timeout_seconds=8)
+
+                if not command:
+                    if session.is_playing():
+                        continue   # silence while the document is being read is expected
+                    consecutive_misses += 1
+                    if consecutive_misses < 3:
+                        speak_now("I did not catch that. Please try again.")
+                    continue
+
+                consecutive_misses = 0
+                command = command.lower().strip()
+
+                # ── reading controls (only while a reading session is open) ───
+                if session.is_active():
+                    if any(k in command for k in ("next", "skip", "forward")):
+                        session.next()
+                        continue
+                    if any(k in command for k in ("back", "previous")):
+                        session.back()
+                        continue
+                    if any(k in command for k in ("pause", "stop reading", "wait", "hold on")) \
+                            or (command == "stop" and session.is_playing()):
+                        session.pause()
+                        part, total = session.progress
+                        speak_now(f"Paused at part {part} of {total}. Say resume to continue.")
+                        continue
+                    if any(k in command for k in ("resume", "continue", "carry on")):
+                        session.resume()
+                        continue
+                    # Any other command: pause the reading so answers are not talked over
+                    session.pause()
+
+                if any(k in command for k in ("resume", "continue", "where i left off")):
+                    session.stop()
+                    session = ReadingSession(doc_hash, full_text, positions=self.positions)
+                    part = min(session.saved_position + 1, len(session.segments))
+                    speak_now(f"Resuming from part {part} of {len(session.segments)}.")
+                    session.start(from_saved=True)
+                    continue
+
+                if any(k in command for k in ("contents", "headings", "sections")):
+                    self._speak_contents(headings)
+
+                elif command.startswith(("go to ", "jump to ", "section ")):
+                    heading = self._match_heading(command, headings)
+                    if heading is None:
+                        speak_now("I could not find that section. Say contents to hear the headings.")
+                        continue
+                    title, _, offset = heading
+                    session.stop()
+                    session = ReadingSession(doc_hash, full_text, positions=self.positions)
+                    speak_now(f"Reading from {title}.")
+                    session.start(at=session.segment_at(offset))
+                    continue
+
+                elif command.startswith(("find ", "search for ", "search ", "look for ")):
+                    self._find(command, doc_hash)
+
+                elif any(k in command for k in ("full text", "read all", "read everything", "everything")):
+                    session.stop()
+                    session = ReadingSession(doc_hash, full_text, positions=self.positions)
                     speak_now(
-                        "I did not recognise the language. "
-                        "Supported languages are Hindi, French, German, Spanish, and English."
+                        f"Reading the full document now, in {len(session.segments)} parts. "
+                        "Say next, back, pause, or resume in the short pause after each part."
                     )
+                    session.start()
                     continue
 
-            elif any(k in command for k in ("done", "stop", "exit", "next", "finish")):
-                speak_now("Going back to waiting for new files. Drop a file into the inbox folder whenever you are ready.")
-                return
+                elif any(k in command for k in ("quick summary", "fast summary", "short summary",
+                                                "detailed summary", "better summary", "best summary")):
+                    preset = "best" if any(k in command for k in ("detailed", "better", "best")) else "fast"
+                    if preset == SUMMARY_PRESET and refined is not None:
+                        # Already running in the background; wait for it instead of starting over
+                        if not refined.ready():
+                            speak_now("The detailed summary is almost ready. Please wait.")
+                        refined.wait()
+                        refined_offered = True
+                        if refined.succeeded(full_text):
+                            summary = refined.result
+                        else:
+                            speak_now("Sorry, I could not prepare the detailed summary. Here is the preview again.")
+                        speak_now(summary)
+                    else:
+                        speak_now("Preparing a quick summary." if preset == "fast"
+                                  else "Preparing a detailed summary. This may take a moment.")
+                        try:
+                            cached = self.store.get_summary(doc_hash, preset) if self.store else None
+                            summary = cached or self._summarize(doc_hash, full_text, preset)
+                            speak_now(summary)
+                        except Exception as e:
+                            speak_now(f"Summarization failed. {e}")
+
+                elif "repeat" in command or "again" in command or "summary" in command:
+                    speak_now(summary)
+
+                elif "translate" in command:
+                    target_code = None
+                    for lang_name, code in LANGUAGE_MAP.items():
+                        if lang_name in command:
+                            target_code = code
+                            lang_display = lang_name.capitalize()
+                            break
+
+                    if target_code and target_code != "en":
+                        speak_now(f"Translating to {lang_display}. Please wait.")
+                        try:
+                            translated = self._translate(doc_hash, summary, target_code)
+                            speak_now(translated, lang=target_code)
+                        except Exception as e:
+                            speak_now(f"Translation failed. {e}")
+                    elif target_code == "en":
+                        speak_now("The content is already in English.")
+                    else:
+                        speak_now(
+                            "I did not recognise the language. "
+                            "Supported languages are Hindi, French, German, Spanish, and English."
+                        )
+                        continue
 
-            else:
-                speak_now(
-                    "Command not recognised. "
-                    "Say full text, translate to a language, repeat, or done."
-                )
-                continue
+                elif any(k in command for k in ("done", "stop", "exit", "next", "finish")):
+                    speak_now("Going back to waiting for new files. Drop a file into the inbox folder whenever you are ready.")
+                    return
 
-            # After each action offer another command
-            speak_now("Anything else? Say a command, or say done to finish.")
+                else:
+                    speak_now(
+                        "Command not recognised. "
+                        "Say full text, translate to a language, repeat, quick summary, find a topic, or done."
+                    )
+                    continue
+
+                # After each action offer another command
+                if session.is_active():
+                    speak_now("Say resume to keep reading, or say another command.")
+                else:
+                    speak_now("Anything else? Say a command, or say done to finish.")
+        finally:
+            session.stop()   # saves the reading position for next time
+            if refined is not None:
+                refined.cancel()   # the user has moved on
 
 
 # ── Entry Point ───────────────────────────────────────────────────────────────
@@ -296,9 +695,22 @@ def main():
     )
     print("\nLoading NLP models…")
 
+    apply_resource_budget()   # before torch spins up its thread pools
+
     from nlp_utils import load_summarizer, load_translation_models
-    summarizer = load_summarizer()
+    summarizer = load_summarizer(SUMMARY_PRESET)
     translation_models, translation_tokenizers = load_translation_models()
+    store = DocumentStore()
+    store.compact()
+    search_index = SearchIndex(store)
+    positions = ReadingPositions(store)
+    memory = TranslationMemory(store)
+    memory.compact()
+
+    # Calibrate the microphone once and keep listening in the background
+    listener = None
+    if os.environ.get("TAPVISION_CONTINUOUS_LISTENING", "1") != "0":
+        listener = BackgroundListener().start()
 
     print("Models ready.\n")
     speak_now(
@@ -309,21 +721,26 @@ def main():
     )
 
     # ── Start folder watcher ──────────────────────────────────────────────────
-    handler  = TapVisionHandler(summarizer, translation_models, translation_tokenizers)
-    observer = Observer()
-    observer.schedule(handler, INBOX_FOLDER, recursive=False)
-    observer.start()
+    # Jobs left over from a previous run (crash, Ctrl+C mid-summary) resume first
+    jobs = JobQueue()
+    resumed = jobs.recover()
+    if resumed:
+        speak_now(f"Resuming {resumed} file{'s' if resumed != 1 else ''} from last time.")
+
+    handler = TapVisionHandler(summarizer, translation_models, translation_tokenizers,
+                               store, search_index, positions, listener, jobs, memory).start()
+    monitor = InboxMonitor(INBOX_FOLDER, handler.submit, handler.skip_duplicate).start()
 
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        observer.stop()
+        monitor.stop()
+        if listener is not None:
+            listener.stop()
         speak_now("TapVision is shutting down. Goodbye.")
         print("\nStopped.")
 
-    observer.join()
-
 
 if __name__ == "__main__":
     main()